@@ -0,0 +1,697 @@
+import random
+import threading
+import time
+
+from pacman_module.game import Agent
+from pacman_module.compactGame import (
+    CompactGame,
+    NUM_HEADINGS,
+    ONGOING,
+    NEAREST_FOOD_WEIGHT,
+    DANGER_DISTANCE,
+)
+from pacman_module.pacman import (
+    GameState,
+    TIME_PENALTY,
+    FOOD_REWARD,
+    WIN_REWARD,
+)
+
+INF = float('inf')
+
+# Forward pruning: futility pruning at Pacman nodes with at most
+# FUTILITY_DEPTH move pairs left, razoring at most RAZOR_DEPTH, late move
+# reductions from LMR_DEPTH on, for the moves after the first LMR_MOVES
+FUTILITY_DEPTH = 2
+RAZOR_DEPTH = 2
+LMR_DEPTH = 3
+LMR_MOVES = 2
+
+# Danger extensions: only horizon nodes are extended, by one move pair, at
+# most MAX_PATH_EXTENSIONS times along a path
+MAX_PATH_EXTENSIONS = 2
+
+# A search with a stop event checks it every STOP_CHECK_NODES nodes. In a
+# background thread, it also releases the interpreter lock every
+# YIELD_NODES nodes (each release sleeps for about 50 microseconds)
+STOP_CHECK_NODES = 8
+YIELD_NODES = 32
+
+
+class TranspositionTable:
+    """Search results by compact state, kept across searches.
+
+    An entry holds the depth it was searched to, lower and upper bounds
+    on its value and its best move (a direction index at Pacman nodes, the
+    ghost state reached at ghost nodes). Values along a search depend on
+    the score collected since the root, so entries store them relative to
+    the score of their node, which lets a later search from another root
+    reuse them. The table is cleared when it reaches `max_entries`.
+    """
+
+    def __init__(self, max_entries=1 << 20):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """Returns the (depth, lower, upper, move) entry of `key`, or
+        None."""
+        self.probes += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def get(self, key):
+        """Returns the entry of `key`, or None, without counting a
+        probe."""
+        return self.entries.get(key)
+
+    def store(self, key, depth, lower, upper, move):
+        """Stores an entry, unless a deeper one is already known."""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > depth:
+            return
+        if entry is None and len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (depth, lower, upper, move)
+
+    def clear(self):
+        self.entries.clear()
+        self.probes = 0
+        self.hits = 0
+
+    def merge(self, other):
+        """Stores the entries of another table."""
+        for key, entry in other.entries.items():
+            self.store(key, *entry)
+
+
+class SearchAborted(Exception):
+    """Raised by a search whose stop event is set."""
+
+
+class AlphaBeta:
+    """Fail-soft alpha-beta search over compact states with a single ghost,
+    optionally with principal variation search and aspiration windows.
+
+    Values are integers: the score collected since the root plus, at the
+    leaves, the maze distance to the nearest dot and the ghost danger
+    penalty. With `pvs`, the first move of a node is searched with the
+    full window and the later ones with a null window, re-searched only
+    when they fail high (low at ghost nodes). With `aspiration`, a search
+    given a guess of the root value starts with the window
+    [guess - aspiration, guess + aspiration] and widens it on failure.
+
+    Forward pruning (futility, razoring, late move reductions) and danger
+    extensions are switched on separately. Given a `TranspositionTable`,
+    nodes probe it for cutoffs and move ordering, and store their results;
+    with `iterative`, the root is searched at increasing depths. A search
+    given a stop event raises `SearchAborted` once it is set; the
+    entries stored so far are those of completed subtrees.
+    """
+
+    def __init__(self, game, depth=4, pvs=False, aspiration=None,
+                 futility=False, razoring=False, lmr=False,
+                 extensions=False, extension_distance=2,
+                 extension_budget=64, tt=None, iterative=False,
+                 stop=None, order_noise=0, seed=0):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            depth: the number of (Pacman, ghost) move pairs to search.
+            pvs: whether to use principal variation search.
+            aspiration: the half-width of the root aspiration window, or
+                None for a full window.
+            futility: whether to prune moves that cannot reach alpha.
+            razoring: whether to search hopeless nodes one move pair
+                shallower before giving up on them.
+            lmr: whether to reduce the depth of late Pacman moves.
+            extensions: whether to extend Pacman nodes on the horizon by
+                one move pair when the ghost is within
+                `extension_distance` (maze distance), and reduce Pacman
+                nodes by one when the ghost cannot reach Pacman within the
+                remaining depth.
+            extension_distance: the maze distance triggering extensions.
+            extension_budget: the maximum number of extensions per search.
+            tt: a `TranspositionTable`, or None.
+            iterative: whether to use iterative deepening.
+            stop: a `threading.Event` or `multiprocessing.Event`
+                aborting the search, or None.
+            order_noise: the amplitude of a uniform noise added to the
+                static evaluations ordering the Pacman moves, 0 for none.
+            seed: the seed of the noise.
+        """
+        self.game = game
+        self.depth = depth
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.futility = futility
+        self.razoring = razoring
+        self.lmr = lmr
+        self.extensions = extensions
+        self.extension_distance = extension_distance
+        self.extension_budget = extension_budget
+        self.tt = tt
+        self.iterative = iterative
+        self.stop = stop
+        self._yield = isinstance(stop, threading.Event)
+        self.order_noise = order_noise
+        self._rng = random.Random(seed)
+        self.extended = 0
+        self.reduced = 0
+        self._path_extensions = 0
+        self.nodes = 0
+        self.researches = 0
+        self.pruned = {'futility': 0, 'razoring': 0, 'lmr': 0}
+
+    def search(self, root, guess=None):
+        """Searches a compact state, Pacman to move.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+            guess: an estimate of the root value, centring the aspiration
+                window, or None.
+
+        Return:
+            A tuple containing the minimax value of the root and the
+            direction index of the best Pacman move.
+        """
+        self.nodes = 0
+        self.researches = 0
+        self.pruned = dict.fromkeys(self.pruned, 0)
+        self.extended = 0
+        self.reduced = 0
+        if not self.iterative:
+            return self.search_depth(root, self.depth, guess)
+        for depth in range(1, self.depth + 1):
+            guess, direction = self.search_depth(root, depth, guess)
+        return guess, direction
+
+    def search_depth(self, root, depth, guess=None):
+        """Searches the root `depth` move pairs deep, in an aspiration
+        window around `guess` if enabled."""
+        pacman, ghost, food = root
+        if self.aspiration is None or guess is None:
+            return self._max_value(pacman, ghost, food, 0, depth,
+                                   -INF, INF, root=True)
+
+        delta = self.aspiration
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            value, direction = self._max_value(pacman, ghost, food, 0,
+                                               depth, alpha, beta,
+                                               root=True)
+            if alpha < value < beta:
+                return value, direction
+            # Fail-soft bound outside the window: widen on that side
+            self.researches += 1
+            delta *= 4
+            if value <= alpha:
+                alpha = value - delta
+            else:
+                beta = value + delta
+
+    def root_moves(self, root):
+        """Returns the direction indices of the Pacman moves of `root`,
+        in search order."""
+        pacman, ghost, food = root
+        return [move[2] for move in self._pacman_moves(pacman, ghost, food,
+                                                       0)]
+
+    def search_move(self, root, direction, depth, alpha=-INF, beta=INF):
+        """Returns the fail-soft value of a Pacman move of `root`, searched
+        `depth` move pairs deep (the move included) with window
+        (alpha, beta)."""
+        pacman, ghost, food = root
+        self.nodes += 1
+        target, child_food, reward, outcome = self.game.pacmanStep(
+            pacman, ghost, food, direction)
+        if outcome != ONGOING:
+            return reward
+        return self._min_value(target, ghost, child_food, reward, depth,
+                               alpha, beta)
+
+    def principal_variation(self, root):
+        """Returns the principal variation of the last search from `root`,
+        read from the transposition table, as a list of compact states
+        with Pacman to move (the root excluded)."""
+        variation = []
+        pacman, ghost, food = root
+        seen = set()
+        while self.tt is not None and (pacman, ghost, food) not in seen:
+            seen.add((pacman, ghost, food))
+            entry = self.tt.get((0, pacman, ghost, food))
+            if entry is None or entry[3] is None:
+                break
+            pacman, food, _, outcome = self.game.pacmanStep(
+                pacman, ghost, food, entry[3])
+            if outcome != ONGOING:
+                break
+            entry = self.tt.get((1, pacman, ghost, food))
+            if entry is None or entry[3] is None:
+                break
+            ghost = entry[3]
+            if ghost // NUM_HEADINGS == pacman:
+                break
+            variation.append((pacman, ghost, food))
+        return variation
+
+    def _probe(self, key, score, depth, alpha, beta):
+        """Returns (cutoff value or None, best move or None) from the
+        transposition table."""
+        if self.tt is None:
+            return None, None
+        entry = self.tt.probe(key)
+        if entry is None:
+            return None, None
+        entry_depth, lower, upper, move = entry
+        if entry_depth >= depth:
+            lower += score
+            upper += score
+            if lower >= beta:
+                return lower, move
+            if upper <= alpha:
+                return upper, move
+            if lower == upper:
+                return lower, move
+        return None, move
+
+    def _store(self, key, score, depth, alpha, beta, value, move):
+        """Stores a fail-soft result searched with window (alpha, beta)."""
+        if self.tt is None:
+            return
+        lower = value - score if value > alpha else -INF
+        upper = value - score if value < beta else INF
+        self.tt.store(key, depth, lower, upper, move)
+
+    def upper_bound(self, pacman, food, score, moves):
+        """Returns an upper bound on the value of a state, ghost to move,
+        followed by `moves` more Pacman moves.
+
+        The ghost cannot add to the score, so only the danger penalty may
+        vanish. Each Pacman move costs TIME_PENALTY and brings the nearest
+        dot at most one cell closer; no dot can be eaten before the
+        nearest one is reached, and each dot is worth FOOD_REWARD, plus
+        WIN_REWARD for the last one.
+        """
+        nearest = self.game.nearestFood(pacman, food)
+        if nearest > moves:
+            return score - moves * TIME_PENALTY + \
+                NEAREST_FOOD_WEIGHT * (nearest - moves)
+        num_food = bin(food).count('1')
+        bound = score + min(moves, num_food) * FOOD_REWARD - \
+            moves * TIME_PENALTY
+        if moves >= num_food:
+            bound += WIN_REWARD
+        return bound
+
+    def razor_margin(self, food, depth):
+        """Returns the gain over the static evaluation below which a
+        Pacman node with `depth` move pairs left is razored: a dot per
+        move, and the win if `depth` moves can eat every dot. The danger
+        penalty vanishing is not accounted for."""
+        margin = depth * (FOOD_REWARD - TIME_PENALTY)
+        if bin(food).count('1') <= depth:
+            margin += WIN_REWARD
+        return margin
+
+    def _pacman_moves(self, pacman, ghost, food, score):
+        """Returns the Pacman moves as (order, over, direction, pacman,
+        food, score), best static evaluation first."""
+        game = self.game
+        moves = []
+        for _, direction in game.pacmanSuccessors[pacman]:
+            target, child_food, reward, outcome = game.pacmanStep(
+                pacman, ghost, food, direction)
+            child_score = score + reward
+            over = outcome != ONGOING
+            order = child_score if over else \
+                game.evaluate(target, ghost, child_food, child_score)
+            if self.order_noise:
+                order += self.order_noise * self._rng.random()
+            moves.append((order, over, direction, target, child_food,
+                          child_score))
+        moves.sort(key=lambda move: -move[0])
+        return moves
+
+    def _ghost_moves(self, pacman, ghost, food, score):
+        """Returns the ghost moves as (order, over, ghost, score), worst
+        static evaluation for Pacman first."""
+        moves = []
+        for child, reward, outcome in self.game.ghostStep(pacman, ghost):
+            child_score = score + reward
+            over = outcome != ONGOING
+            order = child_score if over else \
+                self.game.evaluate(pacman, child, food, child_score)
+            moves.append((order, over, child, child_score))
+        moves.sort(key=lambda move: move[0])
+        return moves
+
+    def _max_value(self, pacman, ghost, food, score, depth, alpha, beta,
+                   root=False):
+        """Value of a Pacman node, `depth` move pairs left."""
+        self.nodes += 1
+        if self.stop is not None and self.nodes % STOP_CHECK_NODES == 0:
+            if self.stop.is_set():
+                raise SearchAborted()
+            if self._yield and self.nodes % YIELD_NODES == 0:
+                time.sleep(0)
+        if self.razoring and not root and 1 < depth <= RAZOR_DEPTH and \
+                self.game.evaluate(pacman, ghost, food, score) + \
+                self.razor_margin(food, depth) <= alpha:
+            # Verify with a shallower null-window search
+            value = self._max_value(pacman, ghost, food, score, depth - 1,
+                                    alpha, alpha + 1)
+            if value <= alpha:
+                self.pruned['razoring'] += 1
+                return value
+
+        key = (0, pacman, ghost, food)
+        cutoff, tt_move = self._probe(key, score, depth, alpha, beta)
+        if cutoff is not None and not root:
+            return cutoff
+        moves = self._pacman_moves(pacman, ghost, food, score)
+        if tt_move is not None:
+            moves.sort(key=lambda move: move[2] != tt_move)
+
+        # Extensions may still deepen the subtree
+        allowance = MAX_PATH_EXTENSIONS - self._path_extensions \
+            if self.extensions else 0
+        value, best = -INF, None
+        # Whether a move was only searched at a reduced depth
+        reduced = False
+        for i, (_, over, direction, target, child_food, child_score) in \
+                enumerate(moves):
+            a = max(alpha, value)
+            if over:
+                child_value = child_score
+            elif self.futility and not root and depth <= FUTILITY_DEPTH \
+                    and self.upper_bound(target, child_food, child_score,
+                                         depth - 1 + allowance) <= a:
+                self.pruned['futility'] += 1
+                child_value = self.upper_bound(target, child_food,
+                                               child_score,
+                                               depth - 1 + allowance)
+            else:
+                child_value = None
+                if self.lmr and depth >= LMR_DEPTH and i >= LMR_MOVES and \
+                        child_food == food and \
+                        self.game.distances[target, ghost // NUM_HEADINGS] \
+                        > 2 * depth + DANGER_DISTANCE:
+                    # Late quiet move: reduced null-window search first
+                    child_value = self._min_value(target, ghost, child_food,
+                                                  child_score, depth - 1, a,
+                                                  a + 1)
+                    if child_value <= a:
+                        self.pruned['lmr'] += 1
+                        reduced = True
+                    else:
+                        child_value = None
+                if child_value is None:
+                    if self.pvs and i > 0:
+                        child_value = self._min_value(
+                            target, ghost, child_food, child_score, depth,
+                            a, a + 1)
+                        if a < child_value < beta:
+                            self.researches += 1
+                            child_value = self._min_value(
+                                target, ghost, child_food, child_score,
+                                depth, child_value, beta)
+                    else:
+                        child_value = self._min_value(
+                            target, ghost, child_food, child_score, depth,
+                            a, beta)
+            if child_value > value:
+                value, best = child_value, direction
+            if value >= beta:
+                break
+        # A value resting on reduced searches is only as deep as they are
+        self._store(key, score, depth - 1 if reduced else depth, alpha,
+                    beta, value, best)
+        if root:
+            return value, best
+        return value
+
+    def _depth_change(self, pacman, ghost, depth):
+        """Returns the extension (+1) or reduction (-1) of a Pacman node
+        with `depth` move pairs left, 0 if its depth is kept."""
+        if not self.extensions:
+            return 0
+        distance = self.game.distances[pacman, ghost // NUM_HEADINGS]
+        if distance <= self.extension_distance:
+            # Extending interior nodes costs more than a uniformly deeper
+            # search; at the horizon, it only resolves the danger in sight
+            if depth == 0 and \
+                    self._path_extensions < MAX_PATH_EXTENSIONS and \
+                    self.extended < self.extension_budget:
+                self.extended += 1
+                return 1
+        elif depth > 1 and distance > 2 * depth + DANGER_DISTANCE:
+            # The ghost cannot reach Pacman within the horizon
+            self.reduced += 1
+            return -1
+        return 0
+
+    def _min_value(self, pacman, ghost, food, score, depth, alpha, beta):
+        """Value of a ghost node, `depth` move pairs left including this
+        one."""
+        self.nodes += 1
+        key = (1, pacman, ghost, food)
+        cutoff, tt_move = self._probe(key, score, depth, alpha, beta)
+        if cutoff is not None:
+            return cutoff
+        moves = self._ghost_moves(pacman, ghost, food, score)
+        if tt_move is not None:
+            moves.sort(key=lambda move: move[2] != tt_move)
+
+        value, best = INF, None
+        for i, (_, over, child, child_score) in enumerate(moves):
+            if over:
+                child_value = child_score
+            else:
+                change = self._depth_change(pacman, child, depth - 1)
+                child_depth = depth - 1 + change
+                if child_depth == 0:
+                    child_value = self.game.evaluate(pacman, child, food,
+                                                     child_score)
+                else:
+                    b = min(beta, value)
+                    self._path_extensions += change > 0
+                    if self.pvs and i > 0:
+                        child_value = self._max_value(
+                            pacman, child, food, child_score, child_depth,
+                            b - 1, b)
+                        if alpha < child_value < b:
+                            self.researches += 1
+                            child_value = self._max_value(
+                                pacman, child, food, child_score,
+                                child_depth, alpha, child_value)
+                    else:
+                        child_value = self._max_value(
+                            pacman, child, food, child_score, child_depth,
+                            alpha, b)
+                    self._path_extensions -= change > 0
+            if child_value < value:
+                value, best = child_value, child
+            if value <= alpha:
+                break
+        self._store(key, score, depth, alpha, beta, value, best)
+        return value
+
+
+class Ponderer:
+    """Background search of the positions that may follow a move, run in
+    a daemon thread while the ghost is thinking.
+
+    The positions are deepened in turn, one move pair at a time, into a
+    table of their own, so that nothing is shared with the caller until
+    `finish` has joined the thread.
+    """
+
+    def __init__(self, game, roots, max_depth, **options):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            roots: the compact states to search, most likely first.
+            max_depth: the depth at which pondering stops.
+            options: keyword arguments of `AlphaBeta`.
+        """
+        self.game = game
+        self.roots = roots
+        self.max_depth = max_depth
+        self.options = options
+        self.tt = TranspositionTable()
+        # Depth completed for each root
+        self.depths = dict.fromkeys(roots, 0)
+        self.nodes = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        engine = AlphaBeta(self.game, tt=self.tt, stop=self._stop,
+                           **self.options)
+        try:
+            for depth in range(1, self.max_depth + 1):
+                for root in self.roots:
+                    engine.search_depth(root, depth)
+                    self.depths[root] = depth
+        except SearchAborted:
+            pass
+        finally:
+            self.nodes = engine.nodes
+            self.elapsed = time.perf_counter() - start
+
+    def finish(self):
+        """Stops the search and waits for the thread to end."""
+        self._stop.set()
+        self._thread.join()
+
+
+class PacmanAgent(Agent):
+    """Pacman agent based on principal variation search over compact
+    states, with aspiration windows centred on the previous move's value
+    and (sound) futility pruning.
+
+    With `reuse_tt`, the transposition table of the iterative deepening
+    search is kept from one move to the next: the position observed after
+    the ghost's reply was usually searched on the previous turn.
+
+    With `ponder`, the positions the ghost's reply may lead to are searched
+    by a `Ponderer` between two calls. If the observed position is one of
+    them, the pondered entries are merged into the table, and the pondered
+    move is played at once if the position was searched at least `depth`
+    move pairs deep; otherwise the entries are dropped. Pondering stops at
+    `ponder_depth` move pairs, by default two beyond `depth`, and at the end
+    of the game (`final`). The time spent in `get_action` and the time
+    spent pondering are accumulated in `search_time` and `ponder_time`.
+    """
+
+    def __init__(self, depth=4, aspiration=20, futility=True,
+                 razoring=False, lmr=False, reuse_tt=True, ponder=False,
+                 ponder_depth=None):
+        super().__init__()
+        self.depth = depth
+        self.aspiration = aspiration
+        self.futility = futility
+        self.razoring = razoring
+        self.lmr = lmr
+        self.reuse_tt = reuse_tt
+        self.ponder = ponder
+        self.ponder_depth = depth + 2 if ponder_depth is None \
+            else ponder_depth
+        self.tt = TranspositionTable()
+        self.previous = None
+        self.variation = []
+        self.pv_hits = 0
+        self.ponderer = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.ponder_nodes = 0
+        self.ponder_time = 0.0
+        self.search_time = 0.0
+
+    def _end_pondering(self, root):
+        """Stops the ponderer and keeps its entries if it searched `root`
+        (None at the end of the game).
+
+        Return:
+            The pondered (value, direction) of `root` if it was searched at
+            least `depth` move pairs deep, None otherwise.
+        """
+        ponderer, self.ponderer = self.ponderer, None
+        ponderer.finish()
+        self.ponder_time += ponderer.elapsed
+        self.ponder_nodes += ponderer.nodes
+        if root is None:
+            return None
+        if root not in ponderer.depths:
+            self.ponder_misses += 1
+            return None
+        self.ponder_hits += 1
+        self.tt.merge(ponderer.tt)
+        if ponderer.depths[root] < self.depth:
+            return None
+        # Full-window root searches store exact values, unless the entry
+        # was replaced or rests on reduced searches
+        entry = self.tt.get((0,) + root)
+        if entry is None or entry[0] < self.depth or \
+                entry[1] != entry[2] or entry[3] is None:
+            return None
+        return entry[1], entry[3]
+
+    def final(self, state):
+        """Stops pondering at the end of the game.
+
+        Arguments:
+            state: the final game state.
+        """
+        if self.ponderer is not None:
+            self._end_pondering(None)
+
+    def _start_pondering(self, game, root, direction):
+        """Starts pondering the positions after `direction` and each ghost
+        reply, the reply predicted by the principal variation first."""
+        pacman, ghost, food = root
+        pacman, food, _, outcome = game.pacmanStep(pacman, ghost, food,
+                                                   direction)
+        if outcome != ONGOING:
+            return
+        roots = [(pacman, child, food) for child, _, child_outcome in
+                 game.ghostStep(pacman, ghost) if child_outcome == ONGOING]
+        if self.variation and self.variation[0] in roots:
+            roots.remove(self.variation[0])
+            roots.insert(0, self.variation[0])
+        if roots:
+            self.ponderer = Ponderer(game, roots, self.ponder_depth,
+                                     pvs=True, futility=self.futility,
+                                     razoring=self.razoring, lmr=self.lmr)
+            self.ponderer.start()
+
+    def get_action(self, state):
+        """Given a Pacman game state, returns a legal move.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A legal move as defined in `game.Directions`.
+        """
+        start = time.perf_counter()
+        game = CompactGame.forLayout(state.data.layout)
+        root = game.fromState(state)
+        if not self.reuse_tt:
+            self.tt.clear()
+        pondered = None
+        if self.ponderer is not None:
+            pondered = self._end_pondering(root)
+        # Re-rooting is implicit: the table is indexed by position
+        if self.variation and self.variation[0] == root:
+            self.pv_hits += 1
+        engine = AlphaBeta(game, self.depth, pvs=True,
+                           aspiration=self.aspiration,
+                           futility=self.futility, razoring=self.razoring,
+                           lmr=self.lmr, tt=self.tt, iterative=True)
+        if pondered is not None:
+            value, direction = pondered
+        else:
+            guess = None
+            if self.previous is not None:
+                # Root values are relative to the root score
+                value, score = self.previous
+                guess = value - (state.getScore() - score)
+            value, direction = engine.search(root, guess)
+        self.previous = (value, state.getScore())
+        self.variation = engine.principal_variation(root)
+        GameState.addExpandedNodes(engine.nodes)
+        if self.ponder:
+            self._start_pondering(game, root, direction)
+        self.search_time += time.perf_counter() - start
+        return game.direction(direction)
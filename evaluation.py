@@ -0,0 +1,246 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from pacman_module.util import manhattanDistance, raiseNotDefined
+
+
+class EvalTerm:
+    """Term of an incrementally updated evaluation function.
+
+    A term keeps an accumulator along the search path. The accumulator is
+    created at the root, updated when an agent moves and when a dot is
+    eaten, and turned into a value at the leaves in O(1). Accumulators must
+    be treated as immutable: siblings share their parent's accumulator.
+    """
+
+    def init(self, state):
+        """Returns the accumulator of the root state."""
+        return None
+
+    def on_move(self, acc, agent_index, state):
+        """Returns the accumulator after `agent_index` moved to `state`."""
+        return acc
+
+    def on_eat(self, acc, position, state):
+        """Returns the accumulator after Pacman ate the dot at `position`."""
+        return acc
+
+    def value(self, acc, state):
+        """Returns the contribution of the term to the evaluation."""
+        raiseNotDefined()
+
+
+class IncrementalEvaluator:
+    """Sum of evaluation terms, updated along the search path."""
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def root(self, state):
+        """Returns the accumulators of the root state.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A tuple with one accumulator per term.
+        """
+        return tuple(term.init(state) for term in self.terms)
+
+    def advance(self, accs, agent_index, child):
+        """Returns the accumulators of a child state.
+
+        To be called in the search's make/advance step, once per generated
+        successor.
+
+        Arguments:
+            accs: the accumulators of the parent state.
+            agent_index: the index of the agent that moved.
+            child: the successor game state.
+
+        Return:
+            A tuple with one accumulator per term.
+        """
+        eaten = child.data._foodEaten if agent_index == 0 else None
+        new_accs = []
+        for term, acc in zip(self.terms, accs):
+            if eaten is not None:
+                acc = term.on_eat(acc, eaten, child)
+            new_accs.append(term.on_move(acc, agent_index, child))
+        return tuple(new_accs)
+
+    def evaluate(self, accs, state):
+        """Returns the evaluation of a state from its accumulators."""
+        return sum(term.value(acc, state)
+                   for term, acc in zip(self.terms, accs))
+
+
+class TerminalTerm(EvalTerm):
+    """Bonus for won states, penalty for lost states."""
+
+    def __init__(self, win=500, lose=-500):
+        self.win = win
+        self.lose = lose
+
+    def value(self, acc, state):
+        if state.isWin():
+            return self.win
+        if state.isLose():
+            return self.lose
+        return 0
+
+
+class FoodEatenTerm(EvalTerm):
+    """Reward per dot eaten since a reference number of dots."""
+
+    def __init__(self, initial_food, reward=10):
+        self.initial_food = initial_food
+        self.reward = reward
+
+    def init(self, state):
+        return self.initial_food - state.getNumFood()
+
+    def on_eat(self, acc, position, state):
+        return acc + 1
+
+    def value(self, acc, state):
+        return self.reward * acc
+
+
+class ScoreTerm(EvalTerm):
+    """Game score of the state, scaled by `weight`."""
+
+    def __init__(self, weight=1):
+        self.weight = weight
+
+    def value(self, acc, state):
+        return self.weight * state.getScore()
+
+
+class GhostDangerTerm(EvalTerm):
+    """Penalty per ghost closer than `distance` (Manhattan) to Pacman.
+
+    The count is refreshed whenever an agent moves.
+    """
+
+    def __init__(self, penalty=-200, distance=2):
+        self.penalty = penalty
+        self.distance = distance
+
+    def _count(self, state):
+        pacman_pos = state.getPacmanPosition()
+        return sum(
+            manhattanDistance(pacman_pos, state.getGhostPosition(i))
+            < self.distance
+            for i in range(1, state.getNumAgents()))
+
+    def init(self, state):
+        return self._count(state)
+
+    def on_move(self, acc, agent_index, state):
+        return self._count(state)
+
+    def value(self, acc, state):
+        return self.penalty * acc
+
+
+class NearestFoodTerm(EvalTerm):
+    """Maze distance from Pacman to the nearest dot, scaled by `weight`.
+
+    The accumulator holds the field of distances to the nearest dot of the
+    current food set for every cell, and its value at Pacman's cell. The
+    field only changes when a dot is eaten; fields are cached by food set
+    with LRU eviction.
+    """
+
+    def __init__(self, weight=-1, cache_size=1024):
+        self.weight = weight
+        self.cache_size = cache_size
+        self.fields = OrderedDict()
+
+    def _field(self, state):
+        key = state.getFoodPositions()
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+            return field
+        layout = state.data.layout
+        if key:
+            cells = [layout.getCellId(pos) for pos in key]
+            field = np.asarray(layout.getDistances()[:, cells].min(axis=1))
+        else:
+            field = np.zeros(layout.getNumCells(), dtype=np.int16)
+        self.fields[key] = field
+        if len(self.fields) > self.cache_size:
+            self.fields.popitem(last=False)
+        return field
+
+    def _at(self, field, state):
+        cell = state.data.layout.getCellId(state.getPacmanPosition())
+        return field, int(field[cell])
+
+    def init(self, state):
+        return self._at(self._field(state), state)
+
+    def on_eat(self, acc, position, state):
+        return self._field(state), acc[1]
+
+    def on_move(self, acc, agent_index, state):
+        if agent_index != 0:
+            return acc
+        return self._at(acc[0], state)
+
+    def value(self, acc, state):
+        return self.weight * acc[1]
+
+
+class EvalCache:
+    """Bounded cache of evaluation results keyed by compact state.
+
+    Entries are evicted in least recently used order once the estimated
+    memory use exceeds `max_bytes`. The cache only stores evaluations, so
+    that evaluation reuse can be measured separately from any search-level
+    transposition table. It can be kept across `get_action` calls.
+    """
+
+    # Rough size of one entry: dict slot, key tuple and its items, value
+    ENTRY_BYTES = 400
+
+    def __init__(self, max_bytes=32 * 2 ** 20):
+        self.max_entries = max(1, max_bytes // self.ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Returns the cached value of `key`, calling `compute()` on a miss.
+
+        Arguments:
+            key: a hashable compact state identity.
+            compute: a function without arguments returning the value.
+
+        Return:
+            The value associated with `key`.
+        """
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+        self.misses += 1
+        value = compute()
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value
+
+    def hit_rate(self):
+        """Returns the fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
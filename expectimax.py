@@ -0,0 +1,365 @@
+import random
+
+from pacman_module.game import Agent
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import (
+    CompactGame,
+    FOOD_REWARD,
+    WIN_REWARD,
+    LOSE_PENALTY,
+    NUM_HEADINGS,
+    ONGOING,
+    LOSE,
+    DANGER_PENALTY,
+    DANGER_DISTANCE,
+)
+from ghost_model import GhostClassifier
+
+# Pruning modes
+NO_PRUNING = 'none'
+STAR1 = 'star1'
+STAR2 = 'star2'
+
+INF = float('inf')
+
+
+class Expectimax:
+    """Depth-limited expectimax over compact states, in which the ghost
+    moves at chance nodes follow a table of move probabilities.
+
+    Chance nodes can be pruned with Ballard's Star1, which bounds the value
+    of the unsearched children by the range of the evaluation, and Star2,
+    which first probes one Pacman move of each child to get tighter lower
+    bounds. The range follows from the game constants: from a node with
+    score s (collected since the root) and r Pacman moves left, any value
+    lies in [s - r - max(LOSE_PENALTY, maxDistance - DANGER_PENALTY),
+    s + FOOD_REWARD * min(r, food)], plus WIN_REWARD when r moves can eat
+    all the dots. The loss and danger terms are dropped when the ghost is
+    too far to reach Pacman within r moves.
+
+    Star2 probes and the lower bounds only help against a finite beta.
+    With a single chance player, beta stays infinite below a full-window
+    root, where both modes reduce to the alpha cutoffs of Star1.
+    """
+
+    def __init__(self, game, ghost_table, depth=3, pruning=STAR2):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            ghost_table: array (numGhostStates, numCells or 1, 4) of the
+                probabilities of the entries of `game.ghostMoves`, given
+                the ghost state and Pacman's cell (see `ghost_model`).
+            depth: the number of (Pacman, ghost) move pairs to search.
+            pruning: NO_PRUNING, STAR1 or STAR2.
+        """
+        self.game = game
+        self.ghost_table = ghost_table
+        self.depth = depth
+        self.pruning = pruning
+        self.nodes = 0
+        self.max_distance = int(game.distances.max())
+        self.worst_leaf = max(LOSE_PENALTY,
+                              self.max_distance - DANGER_PENALTY)
+
+    def lower_bound(self, pacman, ghost, score, depth):
+        """Returns a lower bound on the value of a state with `depth`
+        Pacman moves left, Pacman to move."""
+        lower = score - depth * self.game.timePenalty
+        # Pacman and the ghost close in by at most two cells per move pair
+        if self.game.distances[pacman, ghost // NUM_HEADINGS] > \
+                2 * depth + DANGER_DISTANCE:
+            return lower - self.max_distance
+        return lower - self.worst_leaf
+
+    def upper_bound(self, food, score, depth):
+        """Returns an upper bound on the value of a state with `depth`
+        Pacman moves left, whatever the positions of the agents."""
+        num_food = bin(food).count('1')
+        upper = score + FOOD_REWARD * min(depth, num_food)
+        if depth >= num_food:
+            upper += WIN_REWARD
+        return upper
+
+    def search(self, root):
+        """Searches a compact state, Pacman to move.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+
+        Return:
+            A tuple containing the expectimax value of the root and the
+            direction index of the best Pacman move.
+        """
+        self.nodes = 0
+        pacman, ghost, food = root
+        return self._max_value(pacman, ghost, food, 0, self.depth,
+                               -INF, INF, root=True)
+
+    def _pacman_moves(self, pacman, ghost, food, score):
+        """Returns the Pacman moves as (value if terminal else None,
+        direction, pacman, food, score), best static evaluation first."""
+        game = self.game
+        moves = []
+        for _, direction in game.pacmanSuccessors[pacman]:
+            target, child_food, reward, outcome = game.pacmanStep(
+                pacman, ghost, food, direction)
+            child_score = score + reward
+            if outcome != ONGOING:
+                order = child_score
+            else:
+                order = game.evaluate(target, ghost, child_food,
+                                      child_score)
+            moves.append((order, outcome != ONGOING, direction, target,
+                           child_food, child_score))
+        moves.sort(key=lambda move: -move[0])
+        return moves
+
+    def _max_value(self, pacman, ghost, food, score, depth, alpha, beta,
+                   root=False, first_only=False):
+        """Value of a Pacman node (fail-soft alpha-beta over the moves)."""
+        self.nodes += 1
+        value, best = -INF, None
+        for order, over, direction, target, child_food, child_score in \
+                self._pacman_moves(pacman, ghost, food, score):
+            if over:
+                child_value = child_score
+            else:
+                child_value = self._chance_value(target, ghost, child_food,
+                                                 child_score, depth,
+                                                 max(alpha, value), beta)
+            if child_value > value:
+                value, best = child_value, direction
+            if first_only or (self.pruning != NO_PRUNING and value >= beta):
+                break
+        if root:
+            return value, best
+        return value
+
+    def _ghost_moves(self, pacman, ghost, food, score, depth):
+        """Returns the ghost moves with a non-zero probability as
+        (probability, ghost, value if the child is a leaf else None), most
+        likely first."""
+        game = self.game
+        probs = self.ghost_table[ghost, min(pacman,
+                                            self.ghost_table.shape[1] - 1)]
+        moves = []
+        for k, (child, reward, outcome) in enumerate(
+                game.ghostStep(pacman, ghost)):
+            if probs[k] <= 0:
+                continue
+            if outcome == LOSE:
+                exact = score + reward
+            elif depth == 1:
+                exact = game.evaluate(pacman, child, food, score)
+            else:
+                exact = None
+            moves.append((float(probs[k]), child, exact))
+        # Likely moves first, for earlier Star1 cutoffs
+        moves.sort(key=lambda move: -move[0])
+        return moves
+
+    def _chance_value(self, pacman, ghost, food, score, depth, alpha, beta):
+        """Value of a ghost node, `depth` move pairs left including this
+        one."""
+        self.nodes += 1
+        moves = self._ghost_moves(pacman, ghost, food, score, depth)
+        total = sum(p for p, _, _ in moves)
+
+        # With one move pair left, every child is a leaf valued by
+        # `_ghost_moves`: there is nothing to prune
+        if self.pruning == NO_PRUNING or depth == 1:
+            value = 0.0
+            for p, child, exact in moves:
+                if exact is None:
+                    exact = self._max_value(pacman, child, food, score,
+                                            depth - 1, -INF, INF)
+                value += p * exact
+            return value / total
+
+        child_upper = self.upper_bound(food, score, depth - 1)
+        upper = max(child_upper if exact is None else exact
+                    for _, _, exact in moves)
+        probs = [p / total for p, _, _ in moves]
+        # Lower bounds of the children (exact value, Star2 probe or
+        # `lower_bound`) only serve beta cutoffs. With a single chance
+        # player, beta stays infinite below a full-window root: skip them.
+        if beta == INF:
+            return self._star1_value(pacman, food, score, depth, alpha,
+                                     moves, probs, upper)
+        lows = [self.lower_bound(pacman, child, score, depth - 1)
+                if exact is None else exact for _, child, exact in moves]
+
+        if self.pruning == STAR2:
+            low_sum = sum(p * w for p, w in zip(probs, lows))
+            for i, (_, child, exact) in enumerate(moves):
+                if exact is not None:
+                    continue
+                p = probs[i]
+                child_beta = (beta - (low_sum - p * lows[i])) / p
+                if child_beta >= upper:
+                    # No probe value can reach the cutoff
+                    continue
+                probe = self._max_value(pacman, child, food, score,
+                                        depth - 1, lows[i],
+                                        min(child_beta, upper),
+                                        first_only=True)
+                probe = max(probe, lows[i])
+                low_sum += p * (probe - lows[i])
+                lows[i] = probe
+                if probe >= child_beta:
+                    return low_sum
+
+        # Star1: sum of the searched values, remaining children bounded by
+        # their lower bound and by `upper`
+        value = 0.0
+        rest_low = sum(p * w for p, w in zip(probs, lows))
+        rest = 1.0
+        for i, (_, child, exact) in enumerate(moves):
+            p = probs[i]
+            rest -= p
+            rest_low -= p * lows[i]
+            if exact is None:
+                child_alpha = (alpha - value - rest * upper) / p
+                child_beta = (beta - value - rest_low) / p
+                exact = self._max_value(pacman, child, food, score,
+                                        depth - 1,
+                                        max(child_alpha, lows[i]),
+                                        min(child_beta, upper))
+            value += p * exact
+            if value + rest * upper <= alpha:
+                return value + rest * upper
+            if value + rest_low >= beta:
+                return value + rest_low
+        return value
+
+    def _star1_value(self, pacman, food, score, depth, alpha, moves, probs,
+                     upper):
+        """Star1 value of a ghost node with an infinite beta: only the
+        alpha cutoffs, from the upper bound of the unsearched children."""
+        value = 0.0
+        rest = 1.0
+        for p, (_, child, exact) in zip(probs, moves):
+            rest -= p
+            if exact is None:
+                exact = self._max_value(pacman, child, food, score,
+                                        depth - 1,
+                                        (alpha - value - rest * upper) / p,
+                                        INF)
+            value += p * exact
+            if value + rest * upper <= alpha:
+                return value + rest * upper
+        return value
+
+
+class SparseSampling(Expectimax):
+    """Expectimax in which each chance node averages `width` ghost moves
+    sampled from the ghost table instead of enumerating them all.
+
+    The cost of a search is bounded by (pacmanMoves * width) ** depth,
+    whatever the true branching factor of the ghost; `width` trades the
+    accuracy of each chance node against the affordable depth. Sibling
+    chance nodes (the Pacman moves of a same node) share their uniform
+    numbers, so that their values are compared on common random numbers.
+    The numbers come from a `random.Random(seed)` stream restarted by each
+    search, which makes searches reproducible.
+    """
+
+    def __init__(self, game, ghost_table, depth=3, width=4, seed=0):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            ghost_table: ghost move probabilities (see `Expectimax`).
+            depth: the number of (Pacman, ghost) move pairs to search.
+            width: the number of ghost moves sampled per chance node.
+            seed: the seed of the random number stream.
+        """
+        super().__init__(game, ghost_table, depth, NO_PRUNING)
+        self.width = width
+        self.seed = seed
+        self._rng = None
+        self._uniforms = []
+
+    def search(self, root):
+        self._rng = random.Random(self.seed)
+        return super().search(root)
+
+    def _max_value(self, pacman, ghost, food, score, depth, alpha, beta,
+                   root=False, first_only=False):
+        # Common random numbers for the chance nodes below this node
+        self._uniforms.append([self._rng.random()
+                               for _ in range(self.width)])
+        try:
+            return super()._max_value(pacman, ghost, food, score, depth,
+                                      alpha, beta, root, first_only)
+        finally:
+            self._uniforms.pop()
+
+    def _chance_value(self, pacman, ghost, food, score, depth, alpha, beta):
+        self.nodes += 1
+        moves = self._ghost_moves(pacman, ghost, food, score, depth)
+        total = sum(p for p, _, _ in moves)
+
+        # Inverse transform sampling, each sampled child searched once
+        counts = [0] * len(moves)
+        for u in self._uniforms[-1]:
+            threshold = u * total
+            k = 0
+            while k < len(moves) - 1 and threshold >= moves[k][0]:
+                threshold -= moves[k][0]
+                k += 1
+            counts[k] += 1
+
+        value = 0.0
+        for count, (_, child, exact) in zip(counts, moves):
+            if count == 0:
+                continue
+            if exact is None:
+                exact = self._max_value(pacman, child, food, score,
+                                        depth - 1, -INF, INF)
+            value += count * exact
+        return value / self.width
+
+
+class PacmanAgent(Agent):
+    """Pacman agent based on expectimax with Star2 pruning, using the
+    posterior ghost model of an online `ghost_model.GhostClassifier`.
+
+    With `sampling_width` set, chance nodes are sparse-sampled instead (see
+    `SparseSampling`), with a seed derived from `seed` and the move number.
+    """
+
+    def __init__(self, depth=3, pruning=STAR2, sampling_width=None, seed=0):
+        super().__init__()
+        self.depth = depth
+        self.pruning = pruning
+        self.sampling_width = sampling_width
+        self.seed = seed
+        self.moves = 0
+        self.classifier = GhostClassifier()
+        self.last_successor = None
+
+    def get_action(self, state):
+        """Given a Pacman game state, returns a legal move.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A legal move as defined in `game.Directions`.
+        """
+        if self.last_successor is not None:
+            self.classifier.observe(self.last_successor, state)
+        game = CompactGame.forLayout(state.data.layout)
+        table = self.classifier.table(state.data.layout)
+        if self.sampling_width is None:
+            engine = Expectimax(game, table, self.depth, self.pruning)
+        else:
+            engine = SparseSampling(game, table, self.depth,
+                                    self.sampling_width,
+                                    seed=self.seed * 1000003 + self.moves)
+        self.moves += 1
+        _, direction = engine.search(game.fromState(state))
+        GameState.addExpandedNodes(engine.nodes)
+        action = game.direction(direction)
+        self.last_successor = state.generatePacmanSuccessor(action)
+        return action
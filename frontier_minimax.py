@@ -0,0 +1,154 @@
+import numpy as np
+
+from pacman_module.game import Agent
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import (
+    CompactGame,
+    FOOD_REWARD,
+    WIN_REWARD,
+    LOSE_PENALTY,
+    NUM_HEADINGS,
+)
+
+
+class FrontierMinimax:
+    """Full-width minimax expanded level by level over arrays of compact
+    states, with the whole leaf frontier evaluated in one vectorized pass.
+
+    A level holds, for each node, Pacman's cell id, the ghost state, the
+    food mask, the score collected since the root and whether the game is
+    over. Children of a node are contiguous in the next level, so values
+    are backed up with `reduceat` min/max reductions.
+    """
+
+    def __init__(self, game, depth=4):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            depth: the number of (Pacman, ghost) move pairs to search.
+        """
+        self.game = game
+        self.depth = depth
+        self.nodes = 0
+
+    def evaluate(self, pacman, ghost, food, score, over):
+        """Evaluates a frontier of compact states.
+
+        Arguments:
+            pacman, ghost, food: arrays describing the compact states.
+            score: array of the scores collected since the root.
+            over: boolean array, True for won or lost states.
+
+        Return:
+            An array of values (see `CompactGame.evaluateFrontier`).
+        """
+        return self.game.evaluateFrontier(pacman, ghost, food, score, over)
+
+    def evaluate_one(self, pacman, ghost, food, score, over):
+        """Scalar version of `evaluate`, for checks."""
+        value = self.evaluate(np.array([pacman]), np.array([ghost]),
+                              np.array([food], dtype=np.int64),
+                              np.array([score]), np.array([over]))
+        return float(value[0])
+
+    def _expand(self, level, pacman_turn):
+        game = self.game
+        pacman, ghost, food = level['pacman'], level['ghost'], level['food']
+        if pacman_turn:
+            moves = game.pacmanMoves[pacman]
+        else:
+            moves = game.ghostMoves[ghost]
+        valid = (moves >= 0) & ~level['over'][:, None]
+        parent, action = np.nonzero(valid)
+        target = moves[parent, action]
+        score = level['score'][parent]
+        if pacman_turn:
+            child_pacman, child_ghost = target, ghost[parent]
+            bit = game.foodBit[child_pacman]
+            parent_food = food[parent]
+            eaten = (parent_food & bit) != 0
+            child_food = parent_food & ~bit
+            win = eaten & (child_food == 0)
+            lose = ~win & (child_pacman == child_ghost // NUM_HEADINGS)
+            score = score - game.timePenalty + FOOD_REWARD * eaten + \
+                WIN_REWARD * win - LOSE_PENALTY * lose
+            over = win | lose
+        else:
+            child_pacman, child_ghost = pacman[parent], target
+            child_food = food[parent]
+            lose = child_pacman == child_ghost // NUM_HEADINGS
+            score = score - LOSE_PENALTY * lose
+            over = lose
+        return {
+            'pacman': child_pacman, 'ghost': child_ghost,
+            'food': child_food, 'score': score, 'over': over,
+            'parent': parent, 'action': action,
+        }
+
+    def search(self, root):
+        """Searches a compact state, Pacman to move.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+
+        Return:
+            A tuple containing the minimax value of the root and the
+            direction index of the best Pacman move.
+        """
+        pacman, ghost, food = root
+        levels = [{
+            'pacman': np.array([pacman], dtype=np.int64),
+            'ghost': np.array([ghost], dtype=np.int64),
+            'food': np.array([food], dtype=np.int64),
+            'score': np.zeros(1, dtype=np.int64),
+            'over': np.zeros(1, dtype=bool),
+        }]
+        for ply in range(2 * self.depth):
+            levels.append(self._expand(levels[-1], ply % 2 == 0))
+        self.nodes = sum(len(level['pacman']) for level in levels)
+
+        leaves = levels[-1]
+        values = self.evaluate(leaves['pacman'], leaves['ghost'],
+                               leaves['food'], leaves['score'],
+                               leaves['over'])
+        for ply in range(2 * self.depth - 1, -1, -1):
+            level, children = levels[ply], levels[ply + 1]
+            count = np.bincount(children['parent'],
+                                minlength=len(level['pacman']))
+            # Terminal nodes have no children and keep their evaluation
+            node_values = self.evaluate(level['pacman'], level['ghost'],
+                                        level['food'], level['score'],
+                                        level['over'])
+            inner = count > 0
+            if inner.any():
+                starts = np.concatenate([[0], np.cumsum(count)[:-1]])[inner]
+                reduce = np.maximum if ply % 2 == 0 else np.minimum
+                node_values[inner] = reduce.reduceat(values, starts)
+            root_children = values
+            values = node_values
+
+        best = int(np.argmax(root_children))
+        return float(values[0]), int(levels[1]['action'][best])
+
+
+class PacmanAgent(Agent):
+    """Pacman agent based on frontier-batched minimax over compact states."""
+
+    def __init__(self, depth=4):
+        super().__init__()
+        self.depth = depth
+
+    def get_action(self, state):
+        """Given a Pacman game state, returns a legal move.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A legal move as defined in `game.Directions`.
+        """
+        game = CompactGame.forLayout(state.data.layout)
+        engine = FrontierMinimax(game, self.depth)
+        _, direction = engine.search(game.fromState(state))
+        GameState.addExpandedNodes(engine.nodes)
+        return game.direction(direction)
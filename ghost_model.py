@@ -0,0 +1,334 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from pacman_module.game import Directions
+from pacman_module.util import Counter
+from pacman_module.compactGame import CompactGame
+from pacman_module.compiledLayout import (
+    DIRECTIONS,
+    DIRECTION_INDEX,
+    NUM_HEADINGS,
+)
+
+
+class GhostModel:
+    """Predictive model of the ghosts, mirroring `getDistribution` of a
+    ghost class from `ghostAgents`.
+
+    A prediction is the most likely action of a ghost, returned only when
+    its probability reaches `confidence`. The predictions made for the
+    moves actually played are checked against the observed ghost moves; if
+    the observed accuracy falls below `min_accuracy`, the model stops
+    predicting and the search falls back to full branching.
+
+    Predictions are cached by Pacman and ghost positions and ghost heading,
+    which is all the ghosts of `ghostAgents` look at.
+    """
+
+    def __init__(self, ghost_class, confidence=0.99, min_accuracy=0.9,
+                 warmup=5, cache_size=65536):
+        """
+        Arguments:
+            ghost_class: a `GhostAgent` subclass, built as `ghost_class(i)`.
+            confidence: minimum probability of a predicted action.
+            min_accuracy: minimum observed accuracy to keep predicting.
+            warmup: number of observations before the accuracy is checked.
+            cache_size: maximum number of cached predictions.
+        """
+        self.ghost_class = ghost_class
+        self.confidence = confidence
+        self.min_accuracy = min_accuracy
+        self.warmup = warmup
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def predict(self, state, agent_index):
+        """Returns the predicted action of a ghost.
+
+        Arguments:
+            state: a game state, the ghost `agent_index` to move.
+            agent_index: the index of the ghost.
+
+        Return:
+            The predicted action, or None if the model is not confident
+            enough or not trusted anymore.
+        """
+        if not self.is_trusted():
+            return None
+        key = (agent_index, state.getPacmanPosition(),
+               state.getGhostPosition(agent_index),
+               state.getGhostDirection(agent_index))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        # Fresh ghost, so that hypothetical states do not alter the
+        # internal state of the model
+        dist = self.ghost_class(agent_index).getDistribution(state)
+        action = dist.argMax()
+        if action is not None and dist[action] < self.confidence:
+            action = None
+        self.cache[key] = action
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return action
+
+    def observe(self, previous, state):
+        """Checks the predictions for the ghost moves between `previous`,
+        the state right after Pacman's move, and `state`.
+
+        Arguments:
+            previous: the game state after Pacman's last move.
+            state: the game state when Pacman is to move again.
+        """
+        for i in range(1, state.getNumAgents()):
+            if previous.isWin() or previous.isLose():
+                return
+            actual = state.getGhostDirection(i)
+            dist = self.ghost_class(i).getDistribution(previous)
+            predicted = dist.argMax()
+            if predicted is not None and dist[predicted] >= self.confidence:
+                if predicted == actual:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if actual not in previous.getLegalActions(i):
+                return
+            previous = previous.generateSuccessor(i, actual)
+
+    def accuracy(self):
+        """Returns the fraction of checked predictions that were right."""
+        checked = self.hits + self.misses
+        return self.hits / checked if checked else 1.0
+
+    def is_trusted(self):
+        """Returns whether the model is accurate enough to prune on."""
+        return self.hits + self.misses < self.warmup or \
+            self.accuracy() >= self.min_accuracy
+
+
+def dumby_table(game):
+    """Returns the move probabilities of `DumbyGhost`: turn left if
+    possible, else go straight, else turn right, else turn back.
+
+    Arguments:
+        game: a `compactGame.CompactGame`.
+
+    Return:
+        An array of shape (numGhostStates, 1, 4), the probability of each
+        entry of `game.ghostMoves`.
+    """
+    moves = game.ghostMoves
+    table = np.zeros((len(moves), 1, 4))
+    for s, row in enumerate(moves):
+        actions = [DIRECTIONS[m % NUM_HEADINGS] if m >= 0 else None
+                   for m in row]
+        current = DIRECTIONS[s % NUM_HEADINGS]
+        if current == Directions.STOP:
+            current = Directions.NORTH
+        left = Directions.LEFT[current]
+        for preferred in (left, current, Directions.RIGHT[current],
+                          Directions.LEFT[left]):
+            if preferred in actions:
+                table[s, 0, actions.index(preferred)] = 1.0
+                break
+    return table
+
+
+def greedy_table(game, prob_attack=1.0):
+    """Returns the move probabilities of `GreedyGhost`: the first move
+    minimizing the Manhattan distance to Pacman with probability
+    `prob_attack`, every move sharing the rest.
+
+    Return:
+        An array of shape (numGhostStates, numCells, 4).
+    """
+    positions = np.asarray(game.layout.getCellPositions(), dtype=np.int64)
+    moves = game.ghostMoves
+    targets = positions[np.where(moves >= 0, moves // NUM_HEADINGS, 0)]
+    # dist[s, p, k]: Manhattan distance from the k-th move of s to cell p
+    dist = np.abs(targets[:, None, :, :] -
+                  positions[None, :, None, :]).sum(axis=3)
+    dist = np.where(moves[:, None, :] >= 0, dist, np.iinfo(np.int64).max)
+    table = np.zeros(dist.shape)
+    s, p = np.indices(dist.shape[:2])
+    table[s, p, dist.argmin(axis=2)] = prob_attack
+    valid = moves >= 0
+    table += ((1 - prob_attack) * valid /
+              valid.sum(axis=1, keepdims=True))[:, None, :]
+    return table
+
+
+def smarty_table(game):
+    """Returns the move probabilities of `SmartyGhost`, approximated as the
+    first move along a shortest maze path to Pacman (its A* search breaks
+    ties that way in almost all positions).
+
+    Return:
+        An array of shape (numGhostStates, numCells, 4).
+    """
+    moves = game.ghostMoves
+    targets = np.where(moves >= 0, moves // NUM_HEADINGS, 0)
+    dist = game.distances[targets].transpose(0, 2, 1)
+    dist = np.where(moves[:, None, :] >= 0, dist, np.iinfo(np.int64).max)
+    table = np.zeros(dist.shape)
+    s, p = np.indices(dist.shape[:2])
+    table[s, p, dist.argmin(axis=2)] = 1.0
+    return table
+
+
+def eastrandy_table(game, p=0.5):
+    """Returns the move probabilities of `EastRandyGhost`: East with
+    probability `p` when legal, the other moves sharing the rest.
+
+    Return:
+        An array of shape (numGhostStates, 1, 4).
+    """
+    moves = game.ghostMoves
+    valid = moves >= 0
+    east = valid & (moves % NUM_HEADINGS == DIRECTION_INDEX[Directions.EAST])
+    others = valid & ~east
+    has_east = east.any(axis=1, keepdims=True)
+    num_others = np.maximum(others.sum(axis=1, keepdims=True), 1)
+    table = np.where(
+        has_east,
+        np.where(east, p, others * (1.0 - p) / num_others),
+        valid / valid.sum(axis=1, keepdims=True))
+    table = table / table.sum(axis=1, keepdims=True)
+    return table[:, None, :]
+
+
+GHOST_TABLES = {
+    'dumby': dumby_table,
+    'greedy': greedy_table,
+    'smarty': smarty_table,
+    'eastrandy': eastrandy_table,
+}
+
+
+class GhostClassifier:
+    """Online Bayesian identification of the ghost strategy.
+
+    Each shipped ghost is re-implemented as a table of move probabilities
+    indexed by ghost state and Pacman's cell. After every observed ghost
+    move, the posterior over the ghost types is multiplied by the
+    likelihood of the move under each type, smoothed by `epsilon` so that
+    a single surprising move does not rule a type out for good.
+
+    It can be plugged in as `martin.PacmanAgent.ghost_model`: min nodes
+    then only follow the predicted move once the posterior mixture gives
+    it a probability of at least `confidence`.
+    """
+
+    def __init__(self, types=None, epsilon=0.02, confidence=0.99):
+        """
+        Arguments:
+            types: names of the candidate types, keys of `GHOST_TABLES`
+                (all of them by default), with a uniform prior.
+            epsilon: probability of a move unexplained by the type.
+            confidence: minimum probability of a predicted action.
+        """
+        self.types = list(types or GHOST_TABLES)
+        self.epsilon = epsilon
+        self.confidence = confidence
+        self.log_posterior = np.zeros(len(self.types))
+        self.game = None
+        self.tables = None
+
+    def _prepare(self, layout):
+        game = CompactGame.forLayout(layout)
+        if game is not self.game:
+            self.game = game
+            self.tables = [GHOST_TABLES[name](game) for name in self.types]
+
+    def _probabilities(self, state, agent_index):
+        """Returns the ghost state and the (numTypes, 4) move probabilities
+        of ghost `agent_index` in `state`."""
+        self._prepare(state.data.layout)
+        ghost = self.game.ghostState(state.getGhostPosition(agent_index),
+                                     state.getGhostDirection(agent_index))
+        pacman = self.game.layout.getCellId(state.getPacmanPosition())
+        probs = np.array([table[ghost, min(pacman, table.shape[1] - 1)]
+                          for table in self.tables])
+        return ghost, probs
+
+    def observe(self, previous, state):
+        """Updates the posterior with the ghost moves between `previous`,
+        the state right after Pacman's move, and `state`.
+
+        Arguments:
+            previous: the game state after Pacman's last move.
+            state: the game state when Pacman is to move again.
+        """
+        for i in range(1, state.getNumAgents()):
+            if previous.isWin() or previous.isLose():
+                return
+            actual = state.getGhostDirection(i)
+            ghost, probs = self._probabilities(previous, i)
+            moves = [m % NUM_HEADINGS if m >= 0 else -1
+                     for m in self.game.ghostMoves[ghost]]
+            if DIRECTION_INDEX[actual] not in moves:
+                return
+            k = moves.index(DIRECTION_INDEX[actual])
+            num_moves = len(moves) - moves.count(-1)
+            likelihood = (1 - self.epsilon) * probs[:, k] + \
+                self.epsilon / num_moves
+            self.log_posterior += np.log(likelihood)
+            self.log_posterior -= self.log_posterior.max()
+            previous = previous.generateSuccessor(i, actual)
+
+    def posterior(self):
+        """Returns a dict mapping each ghost type to its probability."""
+        weights = np.exp(self.log_posterior)
+        weights /= weights.sum()
+        return dict(zip(self.types, weights.tolist()))
+
+    def table(self, layout):
+        """Returns the move probabilities of the posterior mixture.
+
+        Arguments:
+            layout: the layout of the game.
+
+        Return:
+            An array of shape (numGhostStates, numCells, 4), aligned with
+            the `ghostMoves` table of the layout's `CompactGame`.
+        """
+        self._prepare(layout)
+        weights = np.exp(self.log_posterior)
+        weights /= weights.sum()
+        mixture = np.zeros(self.tables[0].shape[:1] +
+                           (self.game.numCells, 4))
+        for weight, table in zip(weights, self.tables):
+            mixture += weight * table
+        return mixture
+
+    def distribution(self, state, agent_index):
+        """Returns the predicted move distribution of a ghost.
+
+        Arguments:
+            state: a game state, the ghost `agent_index` to move.
+            agent_index: the index of the ghost.
+
+        Return:
+            A `util.Counter` mapping legal actions to probabilities, the
+            model distributions weighted by the posterior.
+        """
+        ghost, probs = self._probabilities(state, agent_index)
+        weights = np.exp(self.log_posterior)
+        mixture = weights @ probs / weights.sum()
+        dist = Counter()
+        for m, prob in zip(self.game.ghostMoves[ghost], mixture):
+            if m >= 0:
+                dist[DIRECTIONS[m % NUM_HEADINGS]] = float(prob)
+        return dist
+
+    def predict(self, state, agent_index):
+        """Returns the most likely action of a ghost if its probability
+        reaches `confidence`, None otherwise."""
+        dist = self.distribution(state, agent_index)
+        action = dist.argMax()
+        if action is not None and dist[action] < self.confidence:
+            return None
+        return action
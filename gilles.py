@@ -87,7 +87,7 @@ class PacmanAgent(Agent):
             return float('-inf')  # Minimize score for losing state
 
         pacman_pos = state.getPacmanPosition()
-        food_list = state.getFood().asList()
+        food_list = state.getFoodPositions()
         ghost_positions = [state.getGhostPosition(i) for i in range(1, state.getNumAgents())]
 
         # Calculate the distance to the nearest food dot
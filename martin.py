@@ -1,5 +1,18 @@
 from pacman_module.game import Agent, Directions
 from pacman_module.util import manhattanDistance
+from pacman_module.compactGame import CompactGame
+from pacman_module.pacman import GameState
+from pacman_module.foodHeuristic import FoodHeuristic
+from pacman_module.tablebase import Tablebase
+from proof_number import ProofNumberSearch
+from evaluation import (
+    IncrementalEvaluator,
+    TerminalTerm,
+    FoodEatenTerm,
+    ScoreTerm,
+    GhostDangerTerm,
+    NearestFoodTerm,
+)
 
 
 class PacmanAgent(Agent):   
@@ -9,6 +22,27 @@ class PacmanAgent(Agent):
         super().__init__()
         self.initial_state = None # To retrieve initial nb of food dots
         self.depth = 4
+        # Follow corridors to the next junction, dot or danger in one ply.
+        # Opt-in: it costs more than it saves on the provided layouts and
+        # on corridor mazes (see run_tests/bench_macro_actions.py)
+        self.macro_actions = False
+        # Play exactly from the endgame tablebase once at most this many
+        # food dots remain (0 disables it)
+        self.tablebase_max_food = 0
+        # Play the move of a forced win (or the delaying move of a forced
+        # loss) when the proof-number search decides the position within
+        # this many nodes per question (0 disables it, one ghost only)
+        self.proof_nodes = 0
+        self.prover = None
+        # Evaluate leaves in O(1) from accumulators updated along the path
+        self.incremental_eval = False
+        self.evaluator = None
+        # Optional `EvalCache` of positional utilities, kept across moves
+        self.eval_cache = None
+        # Optional `ghost_model.GhostModel` or `GhostClassifier`: min nodes
+        # only follow the predicted ghost move while the model is confident
+        self.ghost_model = None
+        self.last_successor = None
 
     def get_action(self, state):
         """Given a Pacman game state, returns a legal move.
@@ -22,14 +56,83 @@ class PacmanAgent(Agent):
         if self.initial_state is None:
             self.initial_state = state
 
+        if self.ghost_model is not None and self.last_successor is not None:
+            self.ghost_model.observe(self.last_successor, state)
+
+        next_move = self.choose_action(state)
+        if self.ghost_model is not None:
+            self.last_successor = state.generatePacmanSuccessor(next_move)
+        return next_move
+
+    def choose_action(self, state):
+        """Chooses Pacman's move by tablebase lookup, immediate win,
+        proof-number search or minimax search.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A legal move as defined in `game.Directions`.
+        """
+        if self.tablebase_max_food > 0 and \
+                state.getNumFood() <= self.tablebase_max_food:
+            action = Tablebase.forLayout(
+                state.data.layout, self.tablebase_max_food
+            ).getBestAction(state)
+            if action is not None:
+                return action
+
         can_win_next_move, action = self.is_next_win(state)
         if can_win_next_move:
             return action
 
-        _, next_move = self.minimax(state)
+        if self.proof_nodes > 0 and state.getNumAgents() == 2:
+            outcome, action = self.solve(state)
+            if outcome is not None:
+                return action
+
+        if self.incremental_eval:
+            if self.evaluator is None:
+                self.evaluator = self.make_evaluator()
+            _, next_move = self.minimax(state,
+                                        acc=self.evaluator.root(state))
+        else:
+            _, next_move = self.minimax(state)
         return next_move
 
-    def minimax(self, state, depth=0, agentIndex=0, alpha=float('-inf'), beta=float('inf')):
+    def solve(self, state):
+        """Decides the position by proof-number search.
+
+        Arguments:
+            state: a game state with a single ghost.
+
+        Return:
+            A tuple containing:
+            - the proven outcome (`compactGame.WIN` or `LOSE`), or None,
+            - the move to play if the outcome is proven, or None otherwise.
+        """
+        game = CompactGame.forLayout(state.data.layout)
+        # Proofs are cached by position, hence kept across moves
+        if self.prover is None or self.prover.game is not game:
+            self.prover = ProofNumberSearch(game, self.proof_nodes)
+        nodes = self.prover.nodes
+        outcome, direction = self.prover.solve(game.fromState(state))
+        GameState.addExpandedNodes(self.prover.nodes - nodes)
+        if outcome is None:
+            return None, None
+        return outcome, game.direction(direction)
+
+    def make_evaluator(self):
+        """Returns the incremental counterpart of `utility_function`."""
+        return IncrementalEvaluator([
+            TerminalTerm(),
+            FoodEatenTerm(self.initial_state.getNumFood()),
+            ScoreTerm(weight=-1),
+            GhostDangerTerm(penalty=-200, distance=2),
+            NearestFoodTerm(weight=-1),
+        ])
+
+    def minimax(self, state, depth=0, agentIndex=0, alpha=float('-inf'), beta=float('inf'), acc=None):
         """Minimax algorithm with alpha-beta pruning for Pacman game.
 
         Arguments:
@@ -38,20 +141,24 @@ class PacmanAgent(Agent):
             agentIndex: the index of the current agent.
             alpha: the best value that the maximizing player can guarantee.
             beta: the best value that the minimizing player can guarantee.
+            acc: the evaluator accumulators of the state, if incremental
+                evaluation is used.
 
         Return:
             A tuple containing the best score value and corresponding action.
         """
         # Terminal state or max depth
         if state.isWin() or state.isLose() or depth == self.depth:
+            if acc is not None:
+                return self.evaluator.evaluate(acc, state), Directions.STOP
             return self.utility_function(state), Directions.STOP
 
         if agentIndex == 0:   # Pacman's turn (Maximizing player)
-            return self.max_value(state, depth, agentIndex, alpha, beta)
+            return self.max_value(state, depth, agentIndex, alpha, beta, acc)
         else:  # Ghosts' turn (Minimizing player)
-            return self.min_value(state, depth, agentIndex, alpha, beta)
+            return self.min_value(state, depth, agentIndex, alpha, beta, acc)
 
-    def max_value(self, state, depth, agentIndex, alpha, beta):
+    def max_value(self, state, depth, agentIndex, alpha, beta, acc=None):
         """ Returns the maximum value and corresponding action 
         for the given state and agent.
 
@@ -61,17 +168,25 @@ class PacmanAgent(Agent):
             agentIndex: the index of the current agent.
             alpha: the current alpha value for a-B pruning.
             beta: the current beta value for a-B pruning.
+            acc: the evaluator accumulators of the state, or None.
 
         Return:
             A tuple containing the maximum value and corresponding action.
         """
         value = float('-inf')
         best_action = Directions.STOP
-        for s, a in state.generatePacmanSuccessors():
+        if self.macro_actions:
+            successors = [(s, a) for s, a, _ in
+                          state.generatePacmanMacroSuccessors()]
+        else:
+            successors = state.generatePacmanSuccessors()
+        for s, a in successors:
+            child_acc = None if acc is None else \
+                self.evaluator.advance(acc, agentIndex, s)
             if agentIndex == state.getNumAgents() - 1:
-                new_value, _ = self.minimax(s, depth + 1, 0, alpha, beta)
+                new_value, _ = self.minimax(s, depth + 1, 0, alpha, beta, child_acc)
             else:
-                new_value, _ = self.minimax(s, depth, agentIndex + 1, alpha, beta)
+                new_value, _ = self.minimax(s, depth, agentIndex + 1, alpha, beta, child_acc)
             if new_value > value:
                 value, best_action = new_value, a
             if value > beta:
@@ -79,7 +194,7 @@ class PacmanAgent(Agent):
             alpha = max(alpha, value)
         return value, best_action
 
-    def min_value(self, state, depth, agentIndex, alpha, beta):
+    def min_value(self, state, depth, agentIndex, alpha, beta, acc=None):
         """ Returns the minimum value and corresponding action 
         for the given state and agent.
 
@@ -89,16 +204,27 @@ class PacmanAgent(Agent):
             agentIndex: the index of the current agent.
             alpha: the current alpha value for a-B pruning.
             beta: the current beta value for a-B pruning.
+            acc: the evaluator accumulators of the state, or None.
 
         Return:
             A tuple containing the minimum value and corresponding action.
         """
         value = float('inf')
-        for s, a in state.generateGhostSuccessors(agentIndex):
+        successors = None
+        if self.ghost_model is not None:
+            action = self.ghost_model.predict(state, agentIndex)
+            if action is not None:
+                successors = [(state.generateSuccessor(agentIndex, action),
+                               action)]
+        if successors is None:
+            successors = state.generateGhostSuccessors(agentIndex)
+        for s, a in successors:
+            child_acc = None if acc is None else \
+                self.evaluator.advance(acc, agentIndex, s)
             if agentIndex == state.getNumAgents() - 1:
-                new_value, _ = self.minimax(s, depth + 1, 0, alpha, beta)
+                new_value, _ = self.minimax(s, depth + 1, 0, alpha, beta, child_acc)
             else:
-                new_value, _ = self.minimax(s, depth, agentIndex + 1, alpha, beta)
+                new_value, _ = self.minimax(s, depth, agentIndex + 1, alpha, beta, child_acc)
             if new_value < value:
                 value = new_value
             if value < alpha:
@@ -115,15 +241,34 @@ class PacmanAgent(Agent):
         Return:
             The utility score of the given game state.
         """
+        if self.eval_cache is None:
+            positional = self.positional_utility(state)
+        else:
+            positional = self.eval_cache.get(
+                state.getCompactKey(),
+                lambda: self.positional_utility(state))
+
+        # Time steps (the score is path dependent, hence not cached)
+        return positional - state.getScore()
+
+    def positional_utility(self, state):
+        """Calculates the part of the utility score that only depends on
+        the position (agents, food), not on the path that led to it.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            The positional utility score of the given game state.
+        """
         score = 0
         if state.isWin():
             score += 500
         elif state.isLose():
             score -= 500
 
-        # Number of eaten food dots + time steps
+        # Number of eaten food dots
         score += 10 * (self.initial_state.getNumFood() - state.getNumFood())
-        score -= state.getScore()
 
         # Penalize encounters with ghosts
         pacman_pos = state.getPacmanPosition()
@@ -132,13 +277,11 @@ class PacmanAgent(Agent):
             if ghost_dist < 2:  # If the ghost is too close
                 score -= 200
 
-        # Prioritize going to the closest food dot
-        food_list = state.getFood().asList()
-        if food_list:
-            closest_food_dist = min(
-                manhattanDistance(pacman_pos, food) for food in food_list
-            )
-            score -= closest_food_dist
+        # Prioritize going to the closest food dot (maze distance)
+        layout = state.data.layout
+        food_mask = layout.getFoodPositionsMask(state.getFoodPositions())
+        score -= FoodHeuristic.forLayout(layout).getNearestFoodDistance(
+            pacman_pos, food_mask)
 
         return score
 
@@ -0,0 +1,286 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from pacman_module.game import Agent
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import (
+    CompactGame,
+    ONGOING,
+    LOSE,
+)
+from ghost_model import GhostClassifier
+
+NO_NODE = -1
+# Children of a node are indexed by Pacman direction and ghost move
+MAX_GHOST_MOVES = 4
+
+
+class RolloutSimulator:
+    """Fast playouts on compact states: a greedy-food Pacman against a
+    ghost sampled from a table of move probabilities (see `ghost_model`).
+    """
+
+    def __init__(self, game, ghost_table, rng, epsilon=0.1, cache_size=4096):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            ghost_table: array (numGhostStates, numCells or 1, 4) of ghost
+                move probabilities, aligned with `game.ghostMoves`.
+            rng: a `random.Random` instance.
+            epsilon: probability of a random Pacman move.
+            cache_size: maximum number of cached nearest-dot fields.
+        """
+        self.game = game
+        self.rng = rng
+        self.epsilon = epsilon
+        self.cache_size = cache_size
+        # Cumulative ghost move probabilities, as nested lists
+        self.ghost_cdf = np.cumsum(ghost_table, axis=2).tolist()
+        self.ghost_columns = ghost_table.shape[1]
+        self.fields = {}
+
+    def nearest_field(self, food):
+        """Returns, for every cell, the maze distance to the nearest dot of
+        `food`."""
+        field = self.fields.get(food)
+        if field is None:
+            game = self.game
+            cells = [c for i, c in enumerate(game.foodCells)
+                     if (food >> i) & 1]
+            if cells:
+                field = game.distances[:, cells].min(axis=1).tolist()
+            else:
+                field = [0] * game.numCells
+            if len(self.fields) >= self.cache_size:
+                self.fields.clear()
+            self.fields[food] = field
+        return field
+
+    def sample_ghost(self, pacman, ghost):
+        """Returns the index of a sampled ghost move."""
+        cdf = self.ghost_cdf[ghost][min(pacman, self.ghost_columns - 1)]
+        u = self.rng.random() * cdf[-1]
+        k = 0
+        while k < 3 and u >= cdf[k]:
+            k += 1
+        return k
+
+    def pacman_policy(self, pacman, food):
+        """Returns the direction of a greedy-food Pacman move."""
+        moves = self.game.pacmanSuccessors[pacman]
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(moves)[1]
+        field = self.nearest_field(food)
+        best, directions = None, []
+        for target, direction in moves:
+            if best is None or field[target] < best:
+                best, directions = field[target], [direction]
+            elif field[target] == best:
+                directions.append(direction)
+        return self.rng.choice(directions)
+
+    def rollout(self, pacman, ghost, food, horizon):
+        """Plays at most `horizon` move pairs from a state, Pacman to move.
+
+        Return:
+            The score collected and, if the game is not over, the
+            negated maze distance to the nearest dot at the end.
+        """
+        game = self.game
+        total = 0
+        for _ in range(horizon):
+            direction = self.pacman_policy(pacman, food)
+            pacman, food, reward, outcome = game.pacmanStep(
+                pacman, ghost, food, direction)
+            total += reward
+            if outcome != ONGOING:
+                return total
+            k = self.sample_ghost(pacman, ghost)
+            ghost, reward, outcome = game.ghostStep(pacman, ghost)[k]
+            total += reward
+            if outcome != ONGOING:
+                return total
+        return total - self.nearest_field(food)[pacman]
+
+
+class MCTS:
+    """Anytime UCT search over compact states.
+
+    Nodes are Pacman decision states stored in preallocated arrays: the
+    compact state of each node, and for each (node, direction) edge its
+    visit count and value sum. The child reached by direction d and ghost
+    move k is `children[node, d * MAX_GHOST_MOVES + k]`. Ghost moves are
+    sampled from the ghost table during the descent, so that the tree
+    follows the ghost's distribution. Values are the score collected from
+    the root, completed by a rollout.
+    """
+
+    def __init__(self, game, ghost_table, exploration=50.0, max_nodes=50000,
+                 horizon=20, seed=0):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            ghost_table: ghost move probabilities (see `RolloutSimulator`).
+            exploration: the UCT exploration constant, in score units.
+            max_nodes: the node budget, the capacity of the arrays.
+            horizon: the maximum number of move pairs of a rollout.
+            seed: the seed of the random number stream.
+        """
+        self.game = game
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.horizon = horizon
+        self.rng = random.Random(seed)
+        self.simulator = RolloutSimulator(game, ghost_table, self.rng)
+
+        self.pacman = np.zeros(max_nodes, dtype=np.int64)
+        self.ghost = np.zeros(max_nodes, dtype=np.int64)
+        self.food = np.zeros(max_nodes, dtype=np.int64)
+        self.visits = np.zeros(max_nodes, dtype=np.int64)
+        self.edge_visits = np.zeros((max_nodes, 4), dtype=np.int64)
+        self.edge_values = np.zeros((max_nodes, 4), dtype=np.float64)
+        self.children = np.full((max_nodes, 4 * MAX_GHOST_MOVES), NO_NODE,
+                                dtype=np.int32)
+        self.num_nodes = 0
+        self.playouts = 0
+
+    def _new_node(self, pacman, ghost, food):
+        node = self.num_nodes
+        self.pacman[node] = pacman
+        self.ghost[node] = ghost
+        self.food[node] = food
+        self.num_nodes += 1
+        return node
+
+    def _select(self, node):
+        """Returns the UCT direction of a node, untried directions first."""
+        legal = self.game.pacmanMoves[self.pacman[node]] >= 0
+        visits = self.edge_visits[node]
+        untried = legal & (visits == 0)
+        if untried.any():
+            return self.rng.choice(np.flatnonzero(untried).tolist())
+        means = self.edge_values[node] / np.maximum(visits, 1)
+        ucb = means + self.exploration * np.sqrt(
+            math.log(self.visits[node]) / np.maximum(visits, 1))
+        ucb[~legal] = -np.inf
+        return int(np.argmax(ucb))
+
+    def _iterate(self):
+        """Runs one selection, expansion, rollout and backup pass."""
+        game = self.game
+        node = 0
+        path = []
+        total = 0
+        while True:
+            direction = self._select(node)
+            path.append((node, direction))
+            pacman, food, reward, outcome = game.pacmanStep(
+                int(self.pacman[node]), int(self.ghost[node]),
+                int(self.food[node]), direction)
+            total += reward
+            if outcome != ONGOING:
+                break
+            ghost = int(self.ghost[node])
+            k = self.simulator.sample_ghost(pacman, ghost)
+            ghost, reward, outcome = game.ghostStep(pacman, ghost)[k]
+            total += reward
+            if outcome == LOSE:
+                break
+            slot = direction * MAX_GHOST_MOVES + k
+            child = self.children[node, slot]
+            if child == NO_NODE:
+                if self.num_nodes < self.max_nodes:
+                    self.children[node, slot] = self._new_node(
+                        pacman, ghost, food)
+                total += self.simulator.rollout(pacman, ghost, food,
+                                                self.horizon)
+                break
+            node = child
+
+        self.playouts += 1
+        for node, direction in path:
+            self.visits[node] += 1
+            self.edge_visits[node, direction] += 1
+            self.edge_values[node, direction] += total
+
+    def search(self, root, time_limit=None, max_iterations=None):
+        """Searches a compact state, Pacman to move, until the time limit,
+        the iteration limit or the node budget is reached.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+            time_limit: the search time in seconds, or None.
+            max_iterations: the number of playouts, or None.
+
+        Return:
+            A tuple containing the mean value and the direction index of
+            the most visited root move.
+        """
+        if time_limit is None and max_iterations is None:
+            raise ValueError('MCTS needs a time or iteration budget')
+        self.num_nodes = 0
+        self.playouts = 0
+        self.visits[:] = 0
+        self.edge_visits[:] = 0
+        self.edge_values[:] = 0
+        self.children[:] = NO_NODE
+        self._new_node(*root)
+
+        deadline = None if time_limit is None else \
+            time.perf_counter() + time_limit
+        iterations = 0
+        while self.num_nodes < self.max_nodes:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if deadline is not None and iterations % 16 == 0 and \
+                    time.perf_counter() >= deadline:
+                break
+            self._iterate()
+            iterations += 1
+
+        direction = int(np.argmax(self.edge_visits[0]))
+        value = self.edge_values[0, direction] / \
+            max(self.edge_visits[0, direction], 1)
+        return value, direction
+
+
+class PacmanAgent(Agent):
+    """Pacman agent based on Monte Carlo tree search, using the posterior
+    ghost model of an online `ghost_model.GhostClassifier`."""
+
+    def __init__(self, time_limit=0.1, max_nodes=50000, exploration=50.0,
+                 seed=0):
+        super().__init__()
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.exploration = exploration
+        self.seed = seed
+        self.moves = 0
+        self.classifier = GhostClassifier()
+        self.last_successor = None
+
+    def get_action(self, state):
+        """Given a Pacman game state, returns a legal move.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A legal move as defined in `game.Directions`.
+        """
+        if self.last_successor is not None:
+            self.classifier.observe(self.last_successor, state)
+        game = CompactGame.forLayout(state.data.layout)
+        engine = MCTS(game, self.classifier.table(state.data.layout),
+                      self.exploration, self.max_nodes,
+                      seed=self.seed * 1000003 + self.moves)
+        self.moves += 1
+        _, direction = engine.search(game.fromState(state),
+                                     time_limit=self.time_limit)
+        GameState.addExpandedNodes(engine.num_nodes)
+        action = game.direction(direction)
+        self.last_successor = state.generatePacmanSuccessor(action)
+        return action
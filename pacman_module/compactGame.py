@@ -0,0 +1,189 @@
+# compactGame.py
+# --------------
+# Compact model of a game with a single ghost, for fast search.
+#
+# A compact state is a tuple (pacman, ghost, food) of small integers:
+# Pacman's cell id, the ghost state `cell * NUM_HEADINGS + heading` and the
+# bitmask of the remaining dots (see `Layout.getFoodMask`). Moves are
+# applied through precomputed tables and follow `PacmanRules` and
+# `GhostRules` exactly (capsules and scared ghosts aside): -TIME_PENALTY per
+# Pacman move, +10 per dot, +500 for the last dot (which wins even on the
+# ghost's cell), -500 when Pacman and the ghost meet.
+
+
+import numpy as np
+from .compiledLayout import DIRECTIONS, DIRECTION_INDEX, NUM_HEADINGS
+from .pacman import TIME_PENALTY, FOOD_REWARD, WIN_REWARD, LOSE_PENALTY
+
+# Outcome of a move
+ONGOING = 0
+WIN = 1
+LOSE = 2
+
+# Compact masks are machine integers in the vectorized code
+MAX_FOOD = 62
+
+# Leaf evaluation weights of the compact searches (see `evaluate`)
+NEAREST_FOOD_WEIGHT = -1
+DANGER_PENALTY = -200
+DANGER_DISTANCE = 1
+
+COMPACT_GAME_CACHE = {}
+
+
+class CompactGame:
+    """
+    Transition tables of a layout for compact states.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.timePenalty = TIME_PENALTY
+        self.numCells = layout.getNumCells()
+        self.numFood = len(layout.getFoodPositions())
+        if self.numFood > MAX_FOOD:
+            raise ValueError('Too many food dots for compact states: %d'
+                             % self.numFood)
+
+        tables = layout.getTables()
+        neighbors = np.asarray(tables['neighbors'], dtype=np.int64)
+        # pacmanMoves[c, d]: cell reached from c in direction d, -1 if blocked
+        self.pacmanMoves = neighbors
+        self.pacmanTargets = neighbors.tolist()
+        self.pacmanSuccessors = [
+            [(int(n), d) for d, n in enumerate(row) if n >= 0]
+            for row in neighbors]
+
+        # ghostMoves[s, k]: k-th successor ghost state of s, -1 padded
+        offsets = np.asarray(tables['ghostOffsets'], dtype=np.int64)
+        targets = np.asarray(tables['ghostTargets'], dtype=np.int64)
+        actions = np.asarray(tables['ghostActions'], dtype=np.int64)
+        numStates = self.numCells * NUM_HEADINGS
+        self.ghostMoves = np.full((numStates, 4), -1, dtype=np.int64)
+        self.ghostSuccessors = []
+        for s in range(numStates):
+            row = [int(t * NUM_HEADINGS + a)
+                   for t, a in zip(targets[offsets[s]:offsets[s + 1]],
+                                   actions[offsets[s]:offsets[s + 1]])]
+            self.ghostMoves[s, :len(row)] = row
+            self.ghostSuccessors.append(row)
+
+        self.foodCells = np.array(
+            [layout.getCellId(pos) for pos in layout.getFoodPositions()],
+            dtype=np.int64)
+        # foodBit[c]: bit of the dot on cell c, 0 if there is none
+        self.foodBit = np.zeros(self.numCells, dtype=np.int64)
+        self.foodBit[self.foodCells] = np.left_shift(
+            1, np.arange(self.numFood, dtype=np.int64))
+        self.foodBits = [int(b) for b in self.foodBit]
+
+        self.distances = np.asarray(tables['distances'], dtype=np.int64)
+        self.ghostReach = tables['ghostReach']
+        self.foodIndices = np.arange(self.numFood, dtype=np.int64)
+        self.nearestFoodCache = {}
+
+    def forLayout(layout):
+        """
+        Returns the (shared) compact model of `layout`.
+        """
+        key = '\n'.join(layout.layoutText)
+        if key not in COMPACT_GAME_CACHE:
+            COMPACT_GAME_CACHE[key] = CompactGame(layout)
+        return COMPACT_GAME_CACHE[key]
+    forLayout = staticmethod(forLayout)
+
+    def fromState(self, state):
+        """
+        Returns the compact state of a GameState with a single ghost.
+        """
+        if state.getNumAgents() != 2:
+            raise ValueError('Compact states need exactly one ghost')
+        return (self.layout.getCellId(state.getPacmanPosition()),
+                self.ghostState(state.getGhostPosition(1),
+                                state.getGhostDirection(1)),
+                self.layout.getFoodMask(state.getFood()))
+
+    def ghostState(self, pos, direction):
+        return self.layout.getCellId(pos) * NUM_HEADINGS + \
+            DIRECTION_INDEX[direction]
+
+    def ghostCell(self, ghost):
+        return ghost // NUM_HEADINGS
+
+    def direction(self, index):
+        """
+        Returns the `Directions` name of a direction index.
+        """
+        return DIRECTIONS[index]
+
+    def pacmanStep(self, pacman, ghost, food, direction):
+        """
+        Moves Pacman in direction index `direction`.
+
+        Returns (pacman, food, reward, outcome).
+        """
+        pacman = self.pacmanTargets[pacman][direction]
+        if pacman < 0:
+            raise ValueError('Illegal Pacman move')
+        reward = -self.timePenalty
+        bit = self.foodBits[pacman]
+        if food & bit:
+            food &= ~bit
+            reward += FOOD_REWARD
+            if food == 0:
+                return pacman, food, reward + WIN_REWARD, WIN
+        if pacman == ghost // NUM_HEADINGS:
+            return pacman, food, reward - LOSE_PENALTY, LOSE
+        return pacman, food, reward, ONGOING
+
+    def ghostStep(self, pacman, ghost):
+        """
+        Returns [(ghost, reward, outcome)] for each legal ghost move.
+        """
+        return [(g, -LOSE_PENALTY, LOSE) if g // NUM_HEADINGS == pacman
+                else (g, 0, ONGOING)
+                for g in self.ghostSuccessors[ghost]]
+
+    def nearestFood(self, pacman, food):
+        """
+        Returns the maze distance from cell `pacman` to the nearest dot of
+        `food`, 0 if there is none.
+        """
+        key = (pacman, food)
+        nearest = self.nearestFoodCache.get(key)
+        if nearest is None:
+            row = self.distances[pacman]
+            nearest = min((int(row[c]) for i, c in enumerate(self.foodCells)
+                           if (food >> i) & 1), default=0)
+            self.nearestFoodCache[key] = nearest
+        return nearest
+
+    def evaluate(self, pacman, ghost, food, score):
+        """
+        Returns the value of an ongoing leaf: the score collected since the
+        root, the maze distance to the nearest dot and a penalty when the
+        ghost is within DANGER_DISTANCE.
+        """
+        value = score + NEAREST_FOOD_WEIGHT * self.nearestFood(pacman, food)
+        if self.distances[pacman, ghost // NUM_HEADINGS] <= DANGER_DISTANCE:
+            value += DANGER_PENALTY
+        return value
+
+    def evaluateFrontier(self, pacman, ghost, food, score, over):
+        """
+        Vectorized `evaluate` over arrays of compact states, where `over`
+        is True for won or lost states, valued at their score alone.
+        """
+        values = score.astype(np.float64)
+        if self.numFood:
+            bits = (food[:, None] >> self.foodIndices[None, :]) & 1
+            dists = self.distances[pacman][:, self.foodCells]
+            nearest = np.where(bits == 1, dists, np.iinfo(np.int64).max)
+            nearest = nearest.min(axis=1)
+            nearest = np.where(food == 0, 0, nearest)
+        else:
+            nearest = np.zeros(len(pacman), dtype=np.int64)
+        ghostDistances = self.distances[pacman, ghost // NUM_HEADINGS]
+        heuristic = NEAREST_FOOD_WEIGHT * nearest + \
+            DANGER_PENALTY * (ghostDistances <= DANGER_DISTANCE)
+        return np.where(over, values, values + heuristic)
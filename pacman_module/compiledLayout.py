@@ -0,0 +1,379 @@
+# compiledLayout.py
+# -----------------
+# Compiled binary layout artifacts.
+#
+# A compiled layout (`<name>.layc`, next to `<name>.lay`) stores the tables
+# derived from a layout (wall bitmap, cell ids, neighbors, maze distances)
+# in a flat binary file. Arrays are loaded with `numpy.memmap`, so every
+# process that loads the same layout shares the pages through the OS cache
+# instead of recomputing and holding its own copy.
+#
+# File format (all integers little-endian):
+#   magic    8 bytes  b'PACLAYC\0'
+#   version  uint32   FORMAT_VERSION
+#   hlen     uint32   length of the JSON header
+#   header   hlen     JSON: source hash, layout size and, for each array,
+#                     its dtype, shape and byte offset in the file
+#   arrays   raw C-ordered data, each aligned on ALIGNMENT bytes
+
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+from .game import Directions
+
+MAGIC = b'PACLAYC\0'
+FORMAT_VERSION = 6
+ALIGNMENT = 64
+EXTENSION = '.layc'
+
+# Direction order of the neighbor tables, the same as `Actions._directions`.
+# Ghost headings also include STOP, the direction of a ghost that has not
+# moved yet.
+DIRECTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST,
+              Directions.WEST, Directions.STOP]
+DIRECTION_INDEX = dict((d, i) for i, d in enumerate(DIRECTIONS))
+REVERSE_INDEX = [1, 0, 3, 2, 4]
+NUM_DIRECTIONS = 4
+NUM_HEADINGS = 5
+UNREACHABLE = -1
+
+# Horizon of the ghost reachability bitmasks
+MAX_REACH_STEPS = 16
+
+
+def sourceHash(layoutText):
+    """
+    Returns the hash identifying the layout text a compiled artifact was
+    built from.
+    """
+    return hashlib.sha1('\n'.join(layoutText).encode('utf-8')).hexdigest()
+
+
+def compiledPath(layoutPath):
+    """
+    Returns the path of the compiled artifact of a `.lay` file.
+    """
+    root, _ = os.path.splitext(layoutPath)
+    return root + EXTENSION
+
+
+def compileLayout(layout):
+    """
+    Computes the derived tables of a layout.
+
+    Returns a dict mapping table names to numpy arrays:
+      walls         uint8 (width, height), 1 on walls
+      cellIds       int32 (width, height), dense id of free cells, -1 on walls
+      cellPositions int16 (numCells, 2), (x, y) of each cell id
+      neighbors     int32 (numCells, 4), id of the neighbor in each direction
+                    (North, South, East, West), -1 if blocked
+      distances     int16 (numCells, numCells), maze distances, -1 if
+                    unreachable
+      pacmanOffsets, pacmanTargets, pacmanActions
+                    CSR adjacency of Pacman moves: the moves from cell c are
+                    the entries offsets[c]:offsets[c + 1] of the target cell
+                    and direction index arrays (STOP excluded)
+      ghostOffsets, ghostTargets, ghostActions
+                    CSR adjacency of ghost moves, indexed by
+                    cell * NUM_HEADINGS + heading and following the
+                    no-reverse rule of `GhostRules.getLegalActions`
+      junctions     int32 (numJunctions,), cell ids of the junction graph
+                    nodes: every cell without exactly two exits
+      junctionIndex int32 (numCells,), node index of each cell, -1 on
+                    corridor cells
+      junctionOffsets, junctionTargets, junctionLengths, junctionActions
+                    CSR edges of the junction graph: corridors contracted to
+                    an edge to the next junction (node index), its length in
+                    moves and the direction index of its first move
+      ghostReach    uint64 (MAX_REACH_STEPS + 1, numCells * NUM_HEADINGS,
+                    numWords), ghostReach[k, s] is the bitmask of the cells a
+                    ghost in state s = cell * NUM_HEADINGS + heading can
+                    occupy within k moves; cell c is bit c % 64 of word c // 64
+    """
+    width, height = layout.width, layout.height
+    walls = np.zeros((width, height), dtype=np.uint8)
+    cellIds = np.full((width, height), -1, dtype=np.int32)
+    positions = []
+    for x in range(width):
+        for y in range(height):
+            if layout.walls[x][y]:
+                walls[x, y] = 1
+            else:
+                cellIds[x, y] = len(positions)
+                positions.append((x, y))
+    numCells = len(positions)
+
+    vectors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    neighbors = np.full((numCells, NUM_DIRECTIONS), -1, dtype=np.int32)
+    for cell, (x, y) in enumerate(positions):
+        for d, (dx, dy) in enumerate(vectors):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height:
+                neighbors[cell, d] = cellIds[nx, ny]
+
+    pacmanCsr = _csr([[(int(n), d) for d, n in enumerate(row) if n >= 0]
+                      for row in neighbors])
+
+    ghostMoves = []
+    for cell in range(numCells):
+        moves = [(int(n), d) for d, n in enumerate(neighbors[cell]) if n >= 0]
+        for heading in range(NUM_HEADINGS):
+            reverse = REVERSE_INDEX[heading]
+            forward = [m for m in moves if m[1] != reverse]
+            ghostMoves.append(forward if forward else moves)
+    ghostCsr = _csr(ghostMoves)
+
+    adjacency = [[int(n) for n in row if n >= 0] for row in neighbors]
+    junctions, junctionIndex, junctionCsr = _junctionGraph(neighbors,
+                                                           adjacency)
+    ghostReach = _ghostReach(numCells, ghostCsr, MAX_REACH_STEPS)
+
+    distances = np.full((numCells, numCells), UNREACHABLE, dtype=np.int16)
+    for source in range(numCells):
+        row = distances[source]
+        row[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for cell in frontier:
+                for n in adjacency[cell]:
+                    if row[n] == UNREACHABLE:
+                        row[n] = depth
+                        nextFrontier.append(n)
+            frontier = nextFrontier
+
+    tables = {
+        'walls': walls,
+        'cellIds': cellIds,
+        'cellPositions': np.array(positions, dtype=np.int16).reshape(-1, 2),
+        'neighbors': neighbors,
+        'distances': distances,
+        'pacmanOffsets': pacmanCsr[0],
+        'pacmanTargets': pacmanCsr[1],
+        'pacmanActions': pacmanCsr[2],
+        'ghostOffsets': ghostCsr[0],
+        'ghostTargets': ghostCsr[1],
+        'ghostActions': ghostCsr[2],
+        'junctions': junctions,
+        'junctionIndex': junctionIndex,
+        'junctionOffsets': junctionCsr[0],
+        'junctionTargets': junctionCsr[1],
+        'junctionLengths': junctionCsr[2],
+        'junctionActions': junctionCsr[3],
+        'ghostReach': ghostReach,
+    }
+    return tables
+
+
+def cellMask(cells, numCells):
+    """
+    Returns the uint64 bitmask words of a set of cell ids.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    mask = np.zeros((numCells + 63) // 64, dtype=np.uint64)
+    bits = np.left_shift(np.uint64(1), (cells & 63).astype(np.uint64))
+    np.bitwise_or.at(mask, cells >> 6, bits)
+    return mask
+
+
+def _ghostReach(numCells, ghostCsr, maxSteps):
+    """
+    Computes the cells reachable by a ghost within k moves from each
+    (cell, heading) state, for k = 0..maxSteps.
+    """
+    offsets, targets, actions = ghostCsr
+    numStates = numCells * NUM_HEADINGS
+    numWords = (numCells + 63) // 64
+    states = np.arange(numStates)
+    own = np.zeros((numStates, numWords), dtype=np.uint64)
+    cells = states // NUM_HEADINGS
+    own[states, cells >> 6] = np.left_shift(
+        np.uint64(1), (cells & 63).astype(np.uint64))
+
+    # A move to `target` in direction d leaves the ghost heading d
+    successors = targets.astype(np.int64) * NUM_HEADINGS + actions
+    sources = np.repeat(states, np.diff(offsets))
+    reach = np.zeros((maxSteps + 1, numStates, numWords), dtype=np.uint64)
+    reach[0] = own
+    for k in range(1, maxSteps + 1):
+        reach[k] = own
+        np.bitwise_or.at(reach[k], sources, reach[k - 1][successors])
+    return reach
+
+
+def _junctionGraph(neighbors, adjacency):
+    """
+    Contracts the corridors (cells with exactly two exits) of the maze.
+    """
+    numCells = len(adjacency)
+    isJunction = [len(a) != 2 for a in adjacency]
+
+    # A cycle made only of corridor cells still needs one node
+    seen = [False] * numCells
+    for start in range(numCells):
+        if seen[start]:
+            continue
+        component, hasJunction, stack = [], False, [start]
+        seen[start] = True
+        while stack:
+            cell = stack.pop()
+            component.append(cell)
+            hasJunction = hasJunction or isJunction[cell]
+            for n in adjacency[cell]:
+                if not seen[n]:
+                    seen[n] = True
+                    stack.append(n)
+        if not hasJunction:
+            isJunction[min(component)] = True
+
+    junctions = [c for c in range(numCells) if isJunction[c]]
+    junctionIndex = np.full(numCells, -1, dtype=np.int32)
+    junctionIndex[junctions] = np.arange(len(junctions), dtype=np.int32)
+
+    edges = []
+    for cell in junctions:
+        row = []
+        for d, n in enumerate(neighbors[cell]):
+            if n < 0:
+                continue
+            previous, current, length = cell, int(n), 1
+            while not isJunction[current]:
+                a, b = adjacency[current]
+                previous, current = current, (b if a == previous else a)
+                length += 1
+            row.append((int(junctionIndex[current]), length, d))
+        edges.append(row)
+
+    offsets = np.zeros(len(edges) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(row) for row in edges])
+    targets = np.array([e[0] for row in edges for e in row], dtype=np.int32)
+    lengths = np.array([e[1] for row in edges for e in row], dtype=np.int32)
+    actions = np.array([e[2] for row in edges for e in row], dtype=np.int8)
+    return (np.array(junctions, dtype=np.int32), junctionIndex,
+            (offsets, targets, lengths, actions))
+
+
+def _csr(moves):
+    """
+    Packs per-row lists of (target, direction) pairs into CSR arrays.
+    """
+    offsets = np.zeros(len(moves) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(row) for row in moves])
+    targets = np.array([t for row in moves for t, _ in row], dtype=np.int32)
+    actions = np.array([d for row in moves for _, d in row], dtype=np.int8)
+    return offsets, targets, actions
+
+
+# The umask can only be read by setting it: read it once, at import time.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def writeCompiledLayout(path, layoutText, tables):
+    """
+    Writes the tables to `path` in the compiled layout format.
+
+    The file is written to a temporary name and atomically renamed, so
+    concurrent readers only ever see complete artifacts.
+    """
+    arrays = {name: np.ascontiguousarray(
+        table, dtype=np.dtype(table.dtype).newbyteorder('<'))
+        for name, table in tables.items()}
+
+    # The header size depends on the offsets it contains: lay the arrays
+    # out after a generous header, then pad the header up to that point.
+    header = {'source': sourceHash(layoutText), 'arrays': {}}
+    headerSpace = _align(16 + 256 + 128 * len(arrays))
+    offset = headerSpace
+    for name, array in arrays.items():
+        header['arrays'][name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset = _align(offset + array.nbytes)
+    headerBytes = json.dumps(header, sort_keys=True).encode('utf-8')
+    if 16 + len(headerBytes) > headerSpace:
+        raise ValueError('Compiled layout header too large')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmpPath = tempfile.mkstemp(dir=directory, suffix=EXTENSION + '.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<II', FORMAT_VERSION, len(headerBytes)))
+            f.write(headerBytes)
+            for name, array in arrays.items():
+                f.seek(header['arrays'][name]['offset'])
+                f.write(array.tobytes())
+        # mkstemp creates the file readable by its owner only; give the
+        # artifact the permissions of a regular file, so that processes of
+        # other users can map it too.
+        os.chmod(tmpPath, 0o666 & ~_UMASK)
+        os.replace(tmpPath, path)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+
+def loadCompiledLayout(path, layoutText):
+    """
+    Maps the tables of a compiled layout into memory.
+
+    Returns None if the artifact is missing, has another format version, or
+    was built from a different layout text.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            version, headerLength = struct.unpack('<II', f.read(8))
+            if version != FORMAT_VERSION:
+                return None
+            header = json.loads(f.read(headerLength).decode('utf-8'))
+        if header.get('source') != sourceHash(layoutText):
+            return None
+        tables = {}
+        for name, spec in header['arrays'].items():
+            shape = tuple(spec['shape'])
+            if 0 in shape:
+                tables[name] = np.zeros(shape, dtype=spec['dtype'])
+            else:
+                tables[name] = np.memmap(path, dtype=spec['dtype'],
+                                         mode='r', offset=spec['offset'],
+                                         shape=shape)
+        return tables
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def loadOrCompile(layoutPath, layout):
+    """
+    Returns the tables of `layout`, read from the compiled artifact next to
+    `layoutPath` when it is valid. Otherwise the tables are computed and
+    the artifact is (re)written; if the directory is not writable, the
+    freshly computed in-memory tables are returned.
+    """
+    path = compiledPath(layoutPath)
+    tables = loadCompiledLayout(path, layout.layoutText)
+    if tables is not None:
+        return tables
+    tables = compileLayout(layout)
+    try:
+        writeCompiledLayout(path, layout.layoutText, tables)
+    except OSError:
+        return tables
+    return loadCompiledLayout(path, layout.layoutText) or tables
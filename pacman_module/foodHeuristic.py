@@ -0,0 +1,112 @@
+# foodHeuristic.py
+# ----------------
+# Admissible estimate of the remaining eating cost over maze distances:
+# the distance from Pacman to the nearest dot plus the weight of the
+# minimum spanning tree of the remaining dots.
+#
+# The spanning tree only depends on the food set, which rarely changes
+# along a search path, so it is cached by food bitmask (see
+# `Layout.getFoodMask`) with LRU eviction.
+
+
+from collections import OrderedDict
+import numpy as np
+
+FOOD_HEURISTIC_CACHE = {}
+
+
+class FoodHeuristic:
+    """
+    MST food heuristic of a layout with an LRU cache of spanning trees.
+    """
+
+    def __init__(self, layout, cacheSize=4096):
+        self.layout = layout
+        self.cacheSize = cacheSize
+        self.foodCells = np.array([layout.getCellId(pos)
+                                   for pos in layout.getFoodPositions()],
+                                  dtype=np.int64)
+        self.distances = layout.getDistances()
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def forLayout(layout):
+        """
+        Returns the (shared) heuristic of `layout`.
+        """
+        key = '\n'.join(layout.layoutText)
+        if key not in FOOD_HEURISTIC_CACHE:
+            FOOD_HEURISTIC_CACHE[key] = FoodHeuristic(layout)
+        return FOOD_HEURISTIC_CACHE[key]
+    forLayout = staticmethod(forLayout)
+
+    def _entry(self, mask):
+        """
+        Returns (cell ids of the dots, MST weight) of a food mask.
+        """
+        entry = self.cache.get(mask)
+        if entry is not None:
+            self.hits += 1
+            self.cache.move_to_end(mask)
+            return entry
+        self.misses += 1
+        indices = [i for i in range(len(self.foodCells)) if (mask >> i) & 1]
+        cells = self.foodCells[indices]
+        entry = (cells, self._spanningTreeWeight(cells))
+        self.cache[mask] = entry
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return entry
+
+    def _spanningTreeWeight(self, cells):
+        """
+        Prim's algorithm over the maze distances between `cells`.
+        """
+        if len(cells) < 2:
+            return 0
+        weights = np.asarray(self.distances[np.ix_(cells, cells)],
+                             dtype=np.int64)
+        inTree = np.zeros(len(cells), dtype=bool)
+        inTree[0] = True
+        best = weights[0].copy()
+        total = 0
+        for _ in range(len(cells) - 1):
+            candidates = np.where(inTree, np.iinfo(np.int64).max, best)
+            nxt = int(np.argmin(candidates))
+            total += int(candidates[nxt])
+            inTree[nxt] = True
+            best = np.minimum(best, weights[nxt])
+        return total
+
+    def getNearestFoodDistance(self, pos, mask):
+        """
+        Returns the maze distance from `pos` to the nearest dot of `mask`,
+        0 if there is none.
+        """
+        cells, _ = self._entry(mask)
+        if len(cells) == 0:
+            return 0
+        return int(self.distances[self.layout.getCellId(pos), cells].min())
+
+    def getEstimate(self, pos, mask):
+        """
+        Returns a lower bound on the number of moves for Pacman at `pos` to
+        eat all the dots of `mask`.
+        """
+        cells, weight = self._entry(mask)
+        if len(cells) == 0:
+            return 0
+        return weight + \
+            int(self.distances[self.layout.getCellId(pos), cells].min())
+
+    def getStateEstimate(self, state):
+        """
+        Returns the heuristic of a game state.
+        """
+        return self.getEstimate(state.getPacmanPosition(),
+                                self.layout.getFoodMask(state.getFood()))
+
+    def getHitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
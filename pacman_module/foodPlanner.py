@@ -0,0 +1,126 @@
+# foodPlanner.py
+# --------------
+# Exact food-order planning with Held-Karp dynamic programming over maze
+# distances.
+#
+# The cost of a plan is the number of Pacman moves needed to eat every
+# remaining dot, ghosts aside. It is the true minimum, hence an admissible
+# (and tight) bound on the moves left in the game.
+
+
+import numpy as np
+
+# Held-Karp tables grow as 2 ** numFood * numFood
+MAX_FOOD = 20
+
+FOOD_PLANNER_CACHE = {}
+
+
+class FoodPlanner:
+    """
+    Memoized optimal eating orders of the dots of a layout, keyed by
+    (Pacman cell, food bitmask) (see `Layout.getFoodMask`).
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.foodPositions = layout.getFoodPositions()
+        numFood = len(self.foodPositions)
+        if numFood > MAX_FOOD:
+            raise ValueError('Too many food dots for exact planning: %d'
+                             % numFood)
+        self.foodCells = np.array([layout.getCellId(pos)
+                                   for pos in self.foodPositions],
+                                  dtype=np.int64)
+        distances = layout.getDistances()
+        foodDistances = np.asarray(
+            distances[np.ix_(self.foodCells, self.foodCells)],
+            dtype=np.int64)
+        self.fromCell = np.asarray(distances[:, self.foodCells],
+                                   dtype=np.int64)
+        self.tour, self.next = self._solve(foodDistances)
+        self.memo = {}
+
+    def forLayout(layout):
+        """
+        Returns the (shared) planner of `layout`.
+        """
+        key = '\n'.join(layout.layoutText)
+        if key not in FOOD_PLANNER_CACHE:
+            FOOD_PLANNER_CACHE[key] = FoodPlanner(layout)
+        return FOOD_PLANNER_CACHE[key]
+    forLayout = staticmethod(forLayout)
+
+    def _solve(self, foodDistances):
+        """
+        tour[S, i] is the length of the shortest walk starting on dot i
+        (not in S) that eats every dot of S; next[S, i] is the first dot it
+        goes to, -1 when S is empty.
+        """
+        numFood = len(foodDistances)
+        numMasks = 1 << numFood
+        unreachable = np.iinfo(np.int64).max // 4
+        foodDistances = np.where(foodDistances < 0, unreachable,
+                                 foodDistances)
+        tour = np.zeros((numMasks, numFood), dtype=np.int64)
+        nxt = np.full((numMasks, numFood), -1, dtype=np.int64)
+        bits = 1 << np.arange(numFood)
+        for mask in sorted(range(1, numMasks),
+                           key=lambda m: bin(m).count('1')):
+            members = np.nonzero(mask & bits)[0]
+            # costs[i, k]: from dot i, go to member k, then finish the rest
+            costs = foodDistances[:, members] + \
+                tour[mask & ~bits[members], members][None, :]
+            best = np.argmin(costs, axis=1)
+            tour[mask] = np.minimum(costs[np.arange(numFood), best],
+                                    unreachable)
+            nxt[mask] = members[best]
+        return tour, nxt
+
+    def getFoodMask(self, state):
+        """
+        Returns the food bitmask of a game state.
+        """
+        return self.layout.getFoodMask(state.getFood())
+
+    def _first(self, cell, mask):
+        key = (cell, mask)
+        if key not in self.memo:
+            if mask == 0:
+                self.memo[key] = (0, -1)
+            else:
+                members = [i for i in range(len(self.foodCells))
+                           if (mask >> i) & 1]
+                self.memo[key] = min(
+                    (int(self.fromCell[cell, i] +
+                         self.tour[mask & ~(1 << i), i]), i)
+                    for i in members)
+        return self.memo[key]
+
+    def getPlanCost(self, pos, mask):
+        """
+        Returns the minimum number of moves for Pacman at `pos` to eat all
+        the dots of `mask`.
+        """
+        return self._first(self.layout.getCellId(pos), mask)[0]
+
+    def getPlan(self, pos, mask):
+        """
+        Returns the positions of the dots of `mask` in optimal eating order
+        for Pacman at `pos`.
+        """
+        _, i = self._first(self.layout.getCellId(pos), mask)
+        plan = []
+        while i >= 0:
+            plan.append(self.foodPositions[i])
+            mask &= ~(1 << i)
+            i = int(self.next[mask, i])
+        return plan
+
+    def getStateCost(self, state):
+        """
+        Returns the minimum number of moves to clear the board from a game
+        state, ghosts aside.
+        """
+        return self.getPlanCost(state.getPacmanPosition(),
+                                self.getFoodMask(state))
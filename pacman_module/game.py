@@ -27,6 +27,7 @@ import traceback
 import sys
 import pacman_module as pacmodule
 import numpy as np
+import bisect
 from copy import deepcopy
 
 #######################
@@ -40,6 +41,7 @@ class Agent:
     following methods which will be called if they exist:
 
     def registerInitialState(self, state): # inspects the starting state
+    def final(self, state): # inspects the final state, releases resources
     """
 
     def __init__(self, index=0):
@@ -429,6 +431,9 @@ class GameStateData:
         """
         if prevState is not None:
             self.food = prevState.food.shallowCopy()
+            # Immutable food index, shared until a dot is eaten
+            self.numFood = prevState.numFood
+            self.foodPositions = prevState.foodPositions
             self.capsules = prevState.capsules[:]
             self.agentStates = self.copyAgentStates(prevState.agentStates)
             self.layout = prevState.layout
@@ -461,6 +466,18 @@ class GameStateData:
             pass
         return state
 
+    def removeFood(self, position):
+        """
+        Removes the dot at `position` from the food grid and index.
+        """
+        x, y = position
+        self.food = self.food.copy()
+        self.food[x][y] = False
+        i = bisect.bisect_left(self.foodPositions, position)
+        self.foodPositions = self.foodPositions[:i] + \
+            self.foodPositions[i + 1:]
+        self.numFood -= 1
+
     def copyAgentStates(self, agentStates):
         copiedStates = []
         for agentState in agentStates:
@@ -570,6 +587,8 @@ class GameStateData:
         """
 
         self.food = layout.food.copy()
+        self.foodPositions = tuple(self.food.asList())
+        self.numFood = len(self.foodPositions)
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -750,5 +769,12 @@ class Game:
 
         totalScore = self.state.getScore()
 
+        # Let the agents release what they hold for the game
+        for agentIndex, agent in enumerate(self.agents):
+            if "final" in dir(agent):
+                self.mute(agentIndex)
+                agent.final(self.state)
+                self.unmute()
+
         self.display.finish()
         return totalScore,totalComputationTime,totalExpandedNodes
@@ -14,6 +14,8 @@
 
 from .util import manhattanDistance
 from .game import Grid
+from . import compiledLayout
+from . import pursuit
 import os
 import random
 from functools import reduce
@@ -26,7 +28,7 @@ class Layout:
     A Layout manages the static information about the game board.
     """
 
-    def __init__(self, layoutText):
+    def __init__(self, layoutText, tables=None):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
@@ -37,11 +39,197 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.tables = tables
+        self.path = None
+        self._freeCells = None
+        self._foodPositions = None
+        self._foodBits = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getTables(self):
+        """
+        Returns the derived tables of the layout (see `compiledLayout`),
+        computing them in memory if the layout was not loaded from a file.
+        """
+        if self.tables is None:
+            self.tables = compiledLayout.compileLayout(self)
+        return self.tables
+
+    ###############################################
+    # Cell-id graph: free cells numbered 0..n-1   #
+    # in `Grid.asList` order (x-major, then y).   #
+    ###############################################
+
+    def getNumCells(self):
+        return len(self.getTables()['cellPositions'])
+
+    def getCellId(self, pos):
+        """
+        Returns the id of the free cell at `pos`, rounding non-integer
+        positions to the nearest cell, or -1 if `pos` is a wall.
+        """
+        x, y = pos
+        return int(self.getTables()['cellIds'][int(x + 0.5), int(y + 0.5)])
+
+    def getCellPosition(self, cellId):
+        return self.getFreeCells()[cellId]
+
+    def getCellIds(self):
+        """
+        Returns the (width, height) array mapping positions to cell ids.
+        """
+        return self.getTables()['cellIds']
+
+    def getCellPositions(self):
+        """
+        Returns the (numCells, 2) array mapping cell ids to (x, y).
+        """
+        return self.getTables()['cellPositions']
+
+    def getFreeCells(self):
+        """
+        Returns the list of free (x, y) positions, indexed by cell id.
+        """
+        if self._freeCells is None:
+            self._freeCells = [(int(x), int(y))
+                               for x, y in self.getCellPositions()]
+        return self._freeCells
+
+    def getPacmanNeighbors(self):
+        """
+        Returns the CSR arrays (offsets, targets, actions) of Pacman moves:
+        the moves from cell c are targets[offsets[c]:offsets[c + 1]], with
+        direction indices (see `compiledLayout.DIRECTIONS`) in `actions`.
+        """
+        tables = self.getTables()
+        return (tables['pacmanOffsets'], tables['pacmanTargets'],
+                tables['pacmanActions'])
+
+    def getGhostNeighbors(self):
+        """
+        Returns the CSR arrays (offsets, targets, actions) of ghost moves,
+        indexed by `cellId * compiledLayout.NUM_HEADINGS + heading`.
+        """
+        tables = self.getTables()
+        return (tables['ghostOffsets'], tables['ghostTargets'],
+                tables['ghostActions'])
+
+    def getJunctionGraph(self):
+        """
+        Returns the junction graph, in which corridors are contracted to
+        weighted edges, as arrays (junctions, offsets, targets, lengths,
+        actions). Node i is cell junctions[i]; its edges are the entries
+        offsets[i]:offsets[i + 1] of the target node, corridor length and
+        first direction index arrays.
+        """
+        tables = self.getTables()
+        return (tables['junctions'], tables['junctionOffsets'],
+                tables['junctionTargets'], tables['junctionLengths'],
+                tables['junctionActions'])
+
+    def isJunction(self, pos):
+        """
+        Returns True if the cell at `pos` is a node of the junction graph,
+        i.e. a crossing, a dead end or the anchor of a corridor cycle.
+        """
+        return self.getTables()['junctionIndex'][self.getCellId(pos)] >= 0
+
+    def getGhostReach(self):
+        """
+        Returns the ghost reachability bitmasks (see
+        `compiledLayout.compileLayout`), honouring the no-reverse rule of
+        `GhostRules`.
+        """
+        return self.getTables()['ghostReach']
+
+    def getGhostStateId(self, pos, direction):
+        """
+        Returns the index of a ghost (position, direction) in the rows of the
+        ghost neighbor and reachability tables.
+        """
+        return self.getCellId(pos) * compiledLayout.NUM_HEADINGS + \
+            compiledLayout.DIRECTION_INDEX[direction]
+
+    def canGhostReach(self, ghostPos, ghostDirection, pos, steps):
+        """
+        Returns True if a ghost at `ghostPos` heading `ghostDirection` can
+        be on the cell at `pos` within `steps` moves.
+        """
+        if steps > compiledLayout.MAX_REACH_STEPS:
+            raise ValueError('Ghost reach is only tabulated up to %d moves'
+                             % compiledLayout.MAX_REACH_STEPS)
+        cell = self.getCellId(pos)
+        word = self.getGhostReach()[
+            steps, self.getGhostStateId(ghostPos, ghostDirection), cell >> 6]
+        return bool((int(word) >> (cell & 63)) & 1)
+
+    def getCaptureTimes(self):
+        """
+        Returns the single-ghost capture time table (see `pursuit`), solved
+        on first use.
+        """
+        return pursuit.loadCaptureTimes(self)
+
+    def getCaptureTime(self, pacPos, ghostPos, ghostDirection,
+                       pacmanToMove=True):
+        """
+        Returns the number of moves until a ghost at `ghostPos` heading
+        `ghostDirection` catches Pacman at `pacPos` under optimal play of
+        both sides, or None if Pacman can escape forever.
+        """
+        side = pursuit.PACMAN_TO_MOVE if pacmanToMove \
+            else pursuit.GHOST_TO_MOVE
+        time = self.getCaptureTimes()[
+            side, self.getCellId(pacPos),
+            self.getGhostStateId(ghostPos, ghostDirection)]
+        return None if time == pursuit.NEVER else int(time)
+
+    def getFoodPositions(self):
+        """
+        Returns the initial food positions; food bitmasks of the layout use
+        bit i for the i-th of them.
+        """
+        if self._foodPositions is None:
+            self._foodPositions = self.food.asList()
+        return self._foodPositions
+
+    def getFoodMask(self, food):
+        """
+        Returns the bitmask of the dots of a food Grid.
+        """
+        mask = 0
+        for i, (x, y) in enumerate(self.getFoodPositions()):
+            if food[x][y]:
+                mask |= 1 << i
+        return mask
+
+    def getFoodPositionsMask(self, positions):
+        """
+        Returns the bitmask of the dots at `positions`, e.g. the food index
+        of a GameState (`GameState.getFoodPositions`). Unlike `getFoodMask`,
+        it only costs one lookup per remaining dot.
+        """
+        if self._foodBits is None:
+            self._foodBits = dict((pos, 1 << i) for i, pos
+                                  in enumerate(self.getFoodPositions()))
+        mask = 0
+        for pos in positions:
+            mask |= self._foodBits[pos]
+        return mask
+
+    def getDistances(self):
+        """
+        Returns the (numCells, numCells) array of maze distances.
+        """
+        return self.getTables()['distances']
+
+    def getMazeDistance(self, pos1, pos2):
+        return int(self.getDistances()[self.getCellId(pos1),
+                                       self.getCellId(pos2)])
+
     def initializeVisibilityMatrix(self):
         global VISIBILITY_MATRIX_CACHE
         if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
@@ -80,22 +268,24 @@ class Layout:
         return self.walls[x][col]
 
     def getRandomLegalPosition(self):
-        x = random.choice(list(range(1,self.width)))
-        y = random.choice(list(range(1,self.height)))
+        # Rejection sampling, drawing from `random` in the same order as
+        # `random.choice` over the coordinate ranges: seeded games keep
+        # their positions.
+        x = random.randrange(1, self.width)
+        y = random.randrange(1, self.height)
         while self.isWall((x, y)):
-            x = random.choice(list(range(1,self.width)))
-            y = random.choice(list(range(1,self.height)))
-        #print(x,y)
+            x = random.randrange(1, self.width)
+            y = random.randrange(1, self.height)
         return (x, y)
 
     def getPacmanPosition(self): return self.pacPos
 
     def getRandomLegalGhostPosition(self):
-        x = random.choice(list(range(self.width-1)))
-        y = random.choice(list(range(self.height-1)))
-        while self.isWall((x, y)) or (x,y) == self.pacPos:
-            x = random.choice(list(range(self.width-1)))
-            y = random.choice(list(range(self.height-1)))
+        x = random.randrange(self.width - 1)
+        y = random.randrange(self.height - 1)
+        while self.isWall((x, y)) or (x, y) == self.pacPos:
+            x = random.randrange(self.width - 1)
+            y = random.randrange(self.height - 1)
         return (x, y)
 
     def getRandomCorner(self):
@@ -117,7 +307,9 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        layout = Layout(self.layoutText[:], self.tables)
+        layout.path = self.path
+        return layout
 
     def processLayoutText(self, layoutText):
         """
@@ -180,6 +372,9 @@ def tryToLoad(fullname):
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        layout = Layout([line.strip() for line in f])
     finally:
         f.close()
+    layout.path = fullname
+    layout.tables = compiledLayout.loadOrCompile(fullname, layout)
+    return layout
@@ -91,6 +91,14 @@ class GameState:
     def setMaximumExpanded(m):
         GameState.maximumExpanded = m
 
+    def addExpandedNodes(count):
+        """
+        Adds `count` nodes expanded without GameState successors (e.g. by a
+        search over compact states) to the expanded node count.
+        """
+        GameState.countExpanded += count
+    addExpandedNodes = staticmethod(addExpandedNodes)
+
     def getAndResetExplored():
         tmp = GameState.explored.copy()
         GameState.explored = set()
@@ -192,6 +200,60 @@ class GameState:
         GameState.countExpanded += 1
         return [(self.generateSuccessor(index, action),action) for action in self.getLegalActions(index) if action != Directions.STOP]
 
+    def generatePacmanMacroSuccessors(self, dangerDistance=2):
+        """
+        Returns a list of (successor, action, numMoves) triples, one per legal
+        Pacman move. Each macro-action starts with `action` and keeps
+        following the corridor, simulating the ghosts' forced moves in
+        between, until Pacman reaches a junction of the layout, eats a dot,
+        the game ends, a ghost has more than one legal move, or a ghost is
+        within `dangerDistance` (maze distance) of Pacman.
+
+        As with `generatePacmanSuccessors`, the successors are states in
+        which the ghosts are to move. `numMoves` is the number of Pacman
+        moves the macro-action took.
+        """
+        if (GameState.countExpanded >= GameState.maximumExpanded):
+            raise Exception("Too many expanded nodes")
+        GameState.countExpanded += 1
+        return [self._advancePacmanMacro(action, dangerDistance)
+                for action in self.getLegalPacmanActions()
+                if action != Directions.STOP]
+
+    def _advancePacmanMacro(self, action, dangerDistance):
+        layout = self.data.layout
+        ghosts = [i for i in range(1, self.getNumAgents())
+                  if self.data.agentStates[i].agtType > 0]
+        state = self.generateSuccessor(0, action)
+        heading = action
+        numMoves = 1
+        while not (state.isWin() or state.isLose()):
+            pacmanPosition = state.getPacmanPosition()
+            if state.data._foodEaten is not None or \
+                    layout.isJunction(pacmanPosition):
+                break
+            forced = []
+            for index in ghosts:
+                legal = state.getLegalActions(index)
+                if len(legal) != 1 or layout.getMazeDistance(
+                        pacmanPosition,
+                        state.getGhostPosition(index)) <= dangerDistance:
+                    break
+                forced.append(legal[0])
+            if len(forced) != len(ghosts):
+                break
+            for index, ghostAction in zip(ghosts, forced):
+                state = state.generateSuccessor(index, ghostAction)
+                if state.isLose():
+                    return state, action, numMoves
+            # A corridor cell has exactly one exit that is not a half-turn
+            reverse = Directions.REVERSE[heading]
+            heading = [a for a in state.getLegalPacmanActions()
+                       if a != Directions.STOP and a != reverse][0]
+            state = state.generateSuccessor(0, heading)
+            numMoves += 1
+        return state, action, numMoves
+
     def getPacmanState(self):
         """
         Returns an AgentState object for pacman (in game.py)
@@ -253,7 +315,29 @@ class GameState:
         return self.data.capsules
 
     def getNumFood(self):
-        return self.data.food.count()
+        return self.data.numFood
+
+    def getFoodPositions(self):
+        """
+        Returns the sorted tuple of the (x,y) positions of the remaining
+        food dots. Do not rely on it being a new object: states share it
+        until a dot is eaten.
+        """
+        return self.data.foodPositions
+
+    def getCompactKey(self):
+        """
+        Returns a hashable identity of the position, independent of the path
+        that led to it: Pacman's cell id, each ghost's (cell id, direction),
+        the remaining food and the win/lose flags. Scores are not included.
+        """
+        layout = self.data.layout
+        agents = self.data.agentStates
+        ghosts = tuple((layout.getCellId(s.configuration.pos),
+                        s.configuration.direction)
+                       for s in agents[1:] if s.agtType > 0)
+        return (layout.getCellId(agents[0].configuration.pos), ghosts,
+                self.data.foodPositions, self.data._win, self.data._lose)
 
     def getFood(self):
         """
@@ -342,6 +426,9 @@ class GameState:
 SCARED_TIME = 40    # Moves ghosts are scared
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill
 TIME_PENALTY = 1  # Number of points lost each round
+FOOD_REWARD = 10  # Points for eating a food dot
+WIN_REWARD = 500  # Points for eating the last food dot
+LOSE_PENALTY = 500  # Points lost when caught by a ghost
 
 
 class ClassicGameRules:
@@ -459,14 +546,11 @@ class PacmanRules:
         x, y = position
         # Eat food
         if state.data.food[x][y]:
-            state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.scoreChange += FOOD_REWARD
+            state.data.removeFood((x, y))
             state.data._foodEaten = position
-            # TODO: cache numFood?
-            numFood = state.getNumFood()
-            if numFood == 0 and not state.data._lose:
-                state.data.scoreChange += 500
+            if state.getNumFood() == 0 and not state.data._lose:
+                state.data.scoreChange += WIN_REWARD
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
@@ -569,7 +653,7 @@ class GhostRules:
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
-                state.data.scoreChange -= 500
+                state.data.scoreChange -= LOSE_PENALTY
                 state.data._lose = True
     collide = staticmethod(collide)
 
@@ -0,0 +1,110 @@
+# pursuit.py
+# ----------
+# Retrograde solver of the pursuit-evasion game between Pacman and a single
+# ghost, food aside.
+#
+# A position is (Pacman cell, ghost cell, ghost heading, side to move). Its
+# capture time is the number of moves (of either agent) until the ghost
+# catches Pacman when the ghost plays to catch him as soon as possible and
+# Pacman plays to delay capture as long as possible, or NEVER if Pacman can
+# escape forever. Pacman may stop, as `PacmanRules` allow; the ghost cannot
+# stop nor make a half-turn outside dead ends (`GhostRules.getLegalActions`).
+#
+# Solving takes much longer than compiling the layout on large mazes, so the
+# table is only built on first use and kept in its own artifact,
+# `<name>.capture.layc` next to `<name>.lay`, in the compiled layout format.
+
+
+import os
+import numpy as np
+from . import compiledLayout
+
+NEVER = np.iinfo(np.uint16).max
+PACMAN_TO_MOVE = 0
+GHOST_TO_MOVE = 1
+
+CAPTURE_TIMES_CACHE = {}
+
+
+def loadCaptureTimes(layout):
+    """
+    Returns the capture time table of `layout` (see `solveCaptureTimes`),
+    loaded from (or written to) the file next to its `.lay` source when it
+    has one.
+    """
+    key = '\n'.join(layout.layoutText)
+    if key in CAPTURE_TIMES_CACHE:
+        return CAPTURE_TIMES_CACHE[key]
+    tables = None
+    if layout.path is not None:
+        path = os.path.splitext(layout.path)[0] + '.capture' + \
+            compiledLayout.EXTENSION
+        tables = compiledLayout.loadCompiledLayout(path, layout.layoutText)
+    if tables is None:
+        tables = {'captureTimes': solveCaptureTimes(layout.getTables())}
+        if layout.path is not None:
+            try:
+                compiledLayout.writeCompiledLayout(
+                    path, layout.layoutText, tables)
+                tables = compiledLayout.loadCompiledLayout(
+                    path, layout.layoutText) or tables
+            except OSError:
+                pass
+    times = tables['captureTimes']
+    CAPTURE_TIMES_CACHE[key] = times
+    return times
+
+
+def solveCaptureTimes(tables):
+    """
+    Computes the capture time table of a layout from its derived tables
+    (see `compiledLayout.compileLayout`).
+
+    Returns a uint16 array of shape (2, numCells, numCells * NUM_HEADINGS)
+    indexed by [side to move, Pacman cell, ghost state], where the ghost
+    state is cell * NUM_HEADINGS + heading. Unreachable captures are NEVER.
+    """
+    numCells = len(tables['cellPositions'])
+    numHeadings = compiledLayout.NUM_HEADINGS
+    numStates = numCells * numHeadings
+    times = np.full((2, numCells, numStates), NEVER, dtype=np.uint16)
+    if numCells == 0:
+        return times
+
+    # Pacman on the ghost's cell is a capture, whoever moved last
+    cells = np.arange(numCells)
+    for heading in range(numHeadings):
+        times[:, cells, cells * numHeadings + heading] = 0
+
+    # Pacman moves, including STOP (padded with the cell itself)
+    pacmanMoves = np.asarray(tables['neighbors'], dtype=np.int64)
+    pacmanMoves = np.where(pacmanMoves >= 0, pacmanMoves, cells[:, None])
+    pacmanMoves = np.concatenate([cells[:, None], pacmanMoves], axis=1)
+
+    # Ghost moves, as CSR over ghost states
+    offsets = np.asarray(tables['ghostOffsets'], dtype=np.int64)
+    successors = np.asarray(tables['ghostTargets'], dtype=np.int64) * \
+        numHeadings + np.asarray(tables['ghostActions'], dtype=np.int64)
+    canMove = np.diff(offsets) > 0
+    starts = offsets[:-1][canMove]
+
+    pacmanTimes, ghostTimes = times[PACMAN_TO_MOVE], times[GHOST_TO_MOVE]
+    moves = 0
+    while True:
+        moves += 1
+        # Ghost to move: caught in `moves` if one move reaches a position
+        # that is caught in `moves - 1`
+        hits = pacmanTimes[:, successors] == moves - 1
+        ghostWins = np.zeros((numCells, numStates), dtype=bool)
+        ghostWins[:, canMove] = np.logical_or.reduceat(hits, starts, axis=1)
+        ghostWins &= ghostTimes == NEVER
+
+        # Pacman to move: caught in `moves` once every move, the slowest
+        # one being `moves - 1`, is known to be caught
+        pacmanLoses = (ghostTimes[pacmanMoves] != NEVER).all(axis=1)
+        pacmanLoses &= pacmanTimes == NEVER
+
+        if not ghostWins.any() and not pacmanLoses.any():
+            return times
+        ghostTimes[ghostWins] = moves
+        pacmanTimes[pacmanLoses] = moves
@@ -0,0 +1,230 @@
+# tablebase.py
+# ------------
+# Retrograde endgame tablebases for games with a single ghost.
+#
+# A tablebase holds the exact minimax value of every position
+# (Pacman cell, ghost cell, ghost heading, remaining food, side to move)
+# whose remaining food is a subset of the layout's food with at most
+# `maxFood` dots. The value is the score Pacman still collects until the
+# end of the game under optimal play of both sides, with the scoring of
+# `PacmanRules` and `GhostRules`: +10 per dot, +500 for clearing the board,
+# -500 when caught and -TIME_PENALTY per Pacman move. Pacman may stop. If
+# the ghost can keep Pacman from ever ending the game, the value is
+# UNBOUNDED (the score would decrease forever).
+#
+# Tables are stored next to the `.lay` file in the compiled layout format
+# (see `compiledLayout`), as `<name>.tb<maxFood>.layc`, and memory-mapped.
+
+
+import os
+import numpy as np
+from . import compiledLayout
+from .game import Directions
+from .pacman import TIME_PENALTY, FOOD_REWARD, WIN_REWARD, LOSE_PENALTY
+
+UNBOUNDED = np.iinfo(np.int16).min
+
+# Sentinel of the solver, far below any reachable value
+_NEG = -(1 << 30)
+
+TABLEBASE_CACHE = {}
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def buildTablebase(layout, maxFood):
+    """
+    Solves the endgames of `layout` with at most `maxFood` remaining dots.
+
+    Returns a dict of tables:
+      foodCells  int32 (numFood,), cell ids of the layout's dots, in the
+                 bit order of `Layout.getFoodMask`
+      maskIndex  int32 (2 ** numFood,), row of each food mask in `values`,
+                 -1 if the mask has more than maxFood dots
+      values     int16 (numMasks, 2, numCells, numCells * NUM_HEADINGS),
+                 indexed by [mask row, side to move (0 for Pacman),
+                 Pacman cell, ghost state]
+    """
+    tables = layout.getTables()
+    numCells = layout.getNumCells()
+    numHeadings = compiledLayout.NUM_HEADINGS
+    numStates = numCells * numHeadings
+    cells = np.arange(numCells)
+    ghostCells = np.arange(numStates) // numHeadings
+
+    foodCells = np.array([layout.getCellId(pos)
+                          for pos in layout.getFoodPositions()],
+                         dtype=np.int32)
+    numFood = len(foodCells)
+    foodIndex = np.full(numCells, -1, dtype=np.int64)
+    foodIndex[foodCells] = np.arange(numFood)
+
+    masks = sorted((m for m in range(1 << numFood)
+                    if _popcount(m) <= maxFood), key=_popcount)
+    maskIndex = np.full(1 << numFood, -1, dtype=np.int32)
+    maskIndex[masks] = np.arange(len(masks), dtype=np.int32)
+    values = np.full((len(masks), 2, numCells, numStates), UNBOUNDED,
+                     dtype=np.int16)
+
+    # Pacman moves, including STOP (padded with the cell itself)
+    pacmanMoves = np.asarray(tables['neighbors'], dtype=np.int64)
+    pacmanMoves = np.where(pacmanMoves >= 0, pacmanMoves, cells[:, None])
+    pacmanMoves = np.concatenate([cells[:, None], pacmanMoves], axis=1)
+
+    offsets = np.asarray(tables['ghostOffsets'], dtype=np.int64)
+    successors = np.asarray(tables['ghostTargets'], dtype=np.int64) * \
+        numHeadings + np.asarray(tables['ghostActions'], dtype=np.int64)
+    ghostCaught = cells[:, None] == ghostCells[successors][None, :]
+    canMove = np.diff(offsets) > 0
+    starts = offsets[:-1][canMove]
+
+    solved = {}
+    for mask in masks:
+        if mask == 0:
+            continue
+        # Moves that eat a dot lead to an already solved, smaller mask
+        eating = []
+        for k in range(pacmanMoves.shape[1]):
+            targets = pacmanMoves[:, k]
+            child = np.full((numCells, numStates), _NEG, dtype=np.int64)
+            for p in cells:
+                i = foodIndex[targets[p]]
+                if i < 0 or not (mask >> i) & 1:
+                    continue
+                rest = mask & ~(1 << i)
+                reward = FOOD_REWARD - TIME_PENALTY
+                if rest == 0:
+                    child[p] = reward + WIN_REWARD
+                else:
+                    child[p] = np.where(
+                        ghostCells == targets[p], reward - LOSE_PENALTY,
+                        _shift(solved[rest][1][targets[p]], reward))
+            eats = np.array([foodIndex[t] >= 0 and (mask >> foodIndex[t]) & 1
+                             for t in targets])
+            caught = targets[:, None] == ghostCells[None, :]
+            eating.append((targets, eats, caught, child))
+
+        pacmanValues = np.full((numCells, numStates), _NEG, dtype=np.int64)
+        ghostValues = np.full((numCells, numStates), _NEG, dtype=np.int64)
+        while True:
+            vals = np.where(ghostCaught, -LOSE_PENALTY,
+                            pacmanValues[:, successors])
+            newGhost = ghostValues.copy()
+            newGhost[:, canMove] = np.minimum.reduceat(vals, starts, axis=1)
+
+            newPacman = np.full((numCells, numStates), _NEG, dtype=np.int64)
+            for targets, eats, caught, child in eating:
+                moved = np.where(caught, -TIME_PENALTY - LOSE_PENALTY,
+                                 _shift(ghostValues[targets], -TIME_PENALTY))
+                moved = np.where(eats[:, None], child, moved)
+                np.maximum(newPacman, moved, out=newPacman)
+
+            if np.array_equal(newPacman, pacmanValues) and \
+                    np.array_equal(newGhost, ghostValues):
+                break
+            pacmanValues, ghostValues = newPacman, newGhost
+
+        solved[mask] = (pacmanValues, ghostValues)
+        row = maskIndex[mask]
+        values[row, 0] = _toTable(pacmanValues)
+        values[row, 1] = _toTable(ghostValues)
+
+    return {'foodCells': foodCells, 'maskIndex': maskIndex, 'values': values}
+
+
+def _shift(values, reward):
+    """
+    Adds `reward` to solver values, keeping the sentinel in place.
+    """
+    return np.where(values == _NEG, _NEG, values + reward)
+
+
+def _toTable(values):
+    low = np.iinfo(np.int16).min + 1
+    return np.where(values <= low, UNBOUNDED, values).astype(np.int16)
+
+
+class Tablebase:
+    """
+    Lookup of exact endgame values for the states of a layout.
+    """
+
+    def __init__(self, layout, tables):
+        self.layout = layout
+        self.maskIndex = tables['maskIndex']
+        self.values = tables['values']
+
+    def forLayout(layout, maxFood):
+        """
+        Returns the tablebase of `layout`, loaded from (or written to) the
+        file next to its `.lay` source when it has one.
+        """
+        key = ('\n'.join(layout.layoutText), maxFood)
+        if key in TABLEBASE_CACHE:
+            return TABLEBASE_CACHE[key]
+        tables = None
+        if layout.path is not None:
+            path = os.path.splitext(layout.path)[0] + \
+                '.tb%d' % maxFood + compiledLayout.EXTENSION
+            tables = compiledLayout.loadCompiledLayout(path,
+                                                       layout.layoutText)
+        if tables is None:
+            tables = buildTablebase(layout, maxFood)
+            if layout.path is not None:
+                try:
+                    compiledLayout.writeCompiledLayout(
+                        path, layout.layoutText, tables)
+                    tables = compiledLayout.loadCompiledLayout(
+                        path, layout.layoutText) or tables
+                except OSError:
+                    pass
+        tablebase = Tablebase(layout, tables)
+        TABLEBASE_CACHE[key] = tablebase
+        return tablebase
+    forLayout = staticmethod(forLayout)
+
+    def _index(self, state):
+        if state.getNumAgents() != 2 or state.isWin() or state.isLose():
+            return None
+        row = int(self.maskIndex[self.layout.getFoodMask(state.getFood())])
+        if row < 0:
+            return None
+        return (row,
+                self.layout.getCellId(state.getPacmanPosition()),
+                self.layout.getGhostStateId(state.getGhostPosition(1),
+                                            state.getGhostDirection(1)))
+
+    def getValue(self, state, pacmanToMove=True):
+        """
+        Returns the score Pacman still collects from `state` under optimal
+        play, UNBOUNDED if the ghost can keep the game from ending, or None
+        if the state is not covered by the tablebase.
+        """
+        index = self._index(state)
+        if index is None:
+            return None
+        row, pacman, ghost = index
+        return int(self.values[row, 0 if pacmanToMove else 1, pacman, ghost])
+
+    def getBestAction(self, state):
+        """
+        Returns an optimal Pacman move from `state` (Pacman to move), or
+        None if the state is not covered by the tablebase.
+        """
+        if self._index(state) is None:
+            return None
+        best, bestAction = None, None
+        for action in state.getLegalPacmanActions():
+            successor = state.generatePacmanSuccessor(action)
+            value = successor.getScore() - state.getScore()
+            if not (successor.isWin() or successor.isLose()):
+                future = self.getValue(successor, pacmanToMove=False)
+                value = None if future == UNBOUNDED else value + future
+            # Prefer real moves to STOP on ties
+            if bestAction is None or (value is not None and (
+                    best is None or value > best or (
+                        value == best and bestAction == Directions.STOP))):
+                best, bestAction = value, action
+        return bestAction
@@ -0,0 +1,408 @@
+import multiprocessing
+import queue
+from multiprocessing import shared_memory, util
+
+from pacman_module.game import Agent
+from pacman_module.layout import Layout
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import CompactGame, NUM_HEADINGS
+from alphabeta import AlphaBeta, SearchAborted, INF
+
+# Per-process state of a pool worker, set by `_init_worker` or
+# `_init_smp_worker`
+_worker = {}
+
+# Shared table entries: two 64-bit words, the data word and the key xored
+# with it. Data fields, from the low bits: depth + 1, lower and upper bounds
+# (biased, with sentinels for infinite bounds), move + 1
+DEPTH_BITS = 8
+VALUE_BITS = 20
+VALUE_BIAS = 1 << (VALUE_BITS - 1)
+VALUE_MASK = (1 << VALUE_BITS) - 1
+WORD_MASK = (1 << 64) - 1
+# Fibonacci hashing multiplier, spreading packed keys over the slots
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Amplitude of the move ordering noise of the Lazy SMP helpers
+ORDER_NOISE = 4
+
+
+def _init_worker(layout_text, tables, options):
+    """Builds the compact game of a worker once, from the layout text and
+    its precomputed tables."""
+    _worker['game'] = CompactGame.forLayout(Layout(layout_text, tables))
+    _worker['options'] = options
+
+
+def _search_move(task):
+    """Searches one root move in a worker.
+
+    Arguments:
+        task: a tuple (root, direction, depth, alpha) in which root is a
+            compact state and alpha the best root value known so far.
+
+    Return:
+        A tuple (direction, value, nodes). The value is exact if above
+        alpha, an upper bound otherwise.
+    """
+    root, direction, depth, alpha = task
+    engine = AlphaBeta(_worker['game'], depth, **_worker['options'])
+    if alpha == -INF or not engine.pvs:
+        value = engine.search_move(root, direction, depth, alpha, INF)
+    else:
+        # Null window first, as the later moves of a sequential PVS root
+        value = engine.search_move(root, direction, depth, alpha, alpha + 1)
+        if value > alpha:
+            value = engine.search_move(root, direction, depth, value, INF)
+    return direction, value, engine.nodes
+
+
+class RootSplitSearch:
+    """Alpha-beta with the Pacman moves of the root spread over a
+    persistent process pool.
+
+    Workers receive the layout and its tables once, when the pool starts,
+    and then only compact states. The first root move is searched alone
+    with a full window; the others are then dispatched as workers free up,
+    each with the best root value known at that time as its alpha bound,
+    so that later subtrees still prune (young brothers wait).
+    """
+
+    def __init__(self, layout, depth=6, processes=None, **options):
+        """
+        Arguments:
+            layout: the layout of the game.
+            depth: the number of (Pacman, ghost) move pairs to search.
+            processes: the number of worker processes, by default the
+                number of CPUs.
+            options: keyword arguments of `alphabeta.AlphaBeta`.
+        """
+        self.game = CompactGame.forLayout(layout)
+        self.depth = depth
+        self.processes = processes or multiprocessing.cpu_count()
+        self.engine = AlphaBeta(self.game, depth, **options)
+        self.pool = multiprocessing.Pool(
+            self.processes, _init_worker,
+            (layout.layoutText, layout.getTables(), options))
+        self.nodes = 0
+
+    def search(self, root):
+        """Searches a compact state, Pacman to move.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+
+        Return:
+            A tuple containing the minimax value of the root and the
+            direction index of the best Pacman move.
+        """
+        directions = self.engine.root_moves(root)
+        best, value, self.nodes = self.pool.apply(
+            _search_move, ((root, directions[0], self.depth, -INF),))
+
+        results = queue.Queue()
+        pending = directions[1:]
+        running = 0
+        while pending or running:
+            while pending and running < self.processes:
+                task = (root, pending.pop(0), self.depth, value)
+                self.pool.apply_async(_search_move, (task,),
+                                      callback=results.put,
+                                      error_callback=results.put)
+                running += 1
+            result = results.get()
+            running -= 1
+            if isinstance(result, BaseException):
+                raise result
+            direction, child_value, nodes = result
+            self.nodes += nodes
+            if child_value > value:
+                best, value = direction, child_value
+        return value, best
+
+    def close(self):
+        """Stops the worker processes."""
+        self.pool.close()
+        self.pool.join()
+
+
+class SharedTranspositionTable:
+    """Transposition table in a `multiprocessing.shared_memory` block,
+    read and written by several processes without locks.
+
+    The table has `size` slots (a power of two) of two 64-bit words: the
+    data of the entry and its key xored with the data. A slot whose words
+    do not decode to the probed key is a miss, which also discards the
+    slots torn by a concurrent write (Hyatt's lockless hashing). Keys are
+    packed into 64 bits when the side, cells and food mask fit, and hashed
+    otherwise, in which case distinct states may (rarely) collide.
+
+    It offers the interface of `alphabeta.TranspositionTable`. Values must
+    be integers within VALUE_BITS signed bits, or infinite.
+    """
+
+    def __init__(self, game, size=1 << 20, name=None):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            size: the number of slots, a power of two.
+            name: the name of an existing block to attach to, or None to
+                create one.
+        """
+        if size & (size - 1):
+            raise ValueError('The table size must be a power of two')
+        self.size = size
+        self.shift = 64 - size.bit_length() + 1
+        self.pacman_shift = 1
+        self.ghost_shift = self.pacman_shift + \
+            max(game.numCells - 1, 1).bit_length()
+        self.food_shift = self.ghost_shift + \
+            max(game.numCells * NUM_HEADINGS - 1, 1).bit_length()
+        self.packed = self.food_shift + game.numFood <= 64
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner,
+                                              size=16 * size)
+        self.name = self.shm.name
+        self.words = self.shm.buf.cast('Q')
+        if self.owner:
+            self.clear()
+        self.probes = 0
+        self.hits = 0
+
+    def _pack_key(self, key):
+        side, pacman, ghost, food = key
+        if self.packed:
+            return side | pacman << self.pacman_shift | \
+                ghost << self.ghost_shift | food << self.food_shift
+        return hash(key) & WORD_MASK
+
+    def _slot(self, packed):
+        return 2 * (((packed * HASH_MULTIPLIER) & WORD_MASK) >> self.shift)
+
+    def get(self, key):
+        """Returns the (depth, lower, upper, move) entry of `key`, or
+        None, without counting a probe."""
+        packed = self._pack_key(key)
+        slot = self._slot(packed)
+        data = self.words[slot]
+        if data == 0 or self.words[slot + 1] ^ data != packed:
+            return None
+        depth = (data & ((1 << DEPTH_BITS) - 1)) - 1
+        data >>= DEPTH_BITS
+        lower = data & VALUE_MASK
+        data >>= VALUE_BITS
+        upper = data & VALUE_MASK
+        move = (data >> VALUE_BITS) - 1
+        lower = -INF if lower == 0 else lower - VALUE_BIAS
+        upper = INF if upper == VALUE_MASK else upper - VALUE_BIAS
+        return depth, lower, upper, None if move < 0 else move
+
+    def probe(self, key):
+        """Returns the (depth, lower, upper, move) entry of `key`, or
+        None."""
+        self.probes += 1
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def store(self, key, depth, lower, upper, move):
+        """Stores an entry, unless a deeper one is already known for the
+        same key. Entries of other keys are always replaced."""
+        packed = self._pack_key(key)
+        slot = self._slot(packed)
+        data = self.words[slot]
+        if data != 0 and self.words[slot + 1] ^ data == packed and \
+                (data & ((1 << DEPTH_BITS) - 1)) - 1 > depth:
+            return
+        lower = 0 if lower == -INF else int(lower) + VALUE_BIAS
+        upper = VALUE_MASK if upper == INF else int(upper) + VALUE_BIAS
+        data = (depth + 1) | lower << DEPTH_BITS | \
+            upper << (DEPTH_BITS + VALUE_BITS) | \
+            (0 if move is None else move + 1) << \
+            (DEPTH_BITS + 2 * VALUE_BITS)
+        self.words[slot] = data
+        self.words[slot + 1] = packed ^ data
+
+    def clear(self):
+        self.shm.buf[:] = bytes(16 * self.size)
+        self.probes = 0
+        self.hits = 0
+
+    def close(self):
+        """Detaches from the block, and frees it if this table created
+        it. The block cannot be closed while `words` exports it. Closing
+        twice does nothing."""
+        if self.words is None:
+            return
+        self.words.release()
+        self.words = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _init_smp_worker(layout_text, tables, size, name, stop, options):
+    """Builds the compact game of a worker and attaches it to the shared
+    table."""
+    game = CompactGame.forLayout(Layout(layout_text, tables))
+    _worker['game'] = game
+    _worker['tt'] = SharedTranspositionTable(game, size, name)
+    # Detach when the worker exits, before the block is collected
+    util.Finalize(None, _worker['tt'].close, exitpriority=0)
+    _worker['stop'] = stop
+    _worker['options'] = options
+
+
+def _smp_search(task):
+    """Runs the iterative deepening search of one Lazy SMP thread.
+
+    Arguments:
+        task: a tuple (root, depth, index); thread 0 keeps the static move
+            order, the others perturb it with a seed of their own.
+
+    Return:
+        A tuple (index, completed depth, value, direction, nodes), the
+        result of the deepest completed iteration. The first thread to
+        complete `depth` stops the others.
+    """
+    root, depth, index = task
+    stop = _worker['stop']
+    engine = AlphaBeta(_worker['game'], depth, tt=_worker['tt'], stop=stop,
+                       order_noise=ORDER_NOISE if index else 0, seed=index,
+                       **_worker['options'])
+    completed, value, direction = 0, None, None
+    try:
+        for d in range(1, depth + 1):
+            value, direction = engine.search_depth(root, d, value)
+            completed = d
+        stop.set()
+    except SearchAborted:
+        pass
+    return index, completed, value, direction, engine.nodes
+
+
+class LazySMP:
+    """Lazy SMP: the same iterative deepening search run by several
+    processes at once, which only communicate through a shared
+    transposition table (see `SharedTranspositionTable`).
+
+    The helpers order the Pacman moves on a noisy evaluation, so that they
+    explore different subtrees first and fill the table with results the
+    others can use. The first process to complete the full depth stops
+    the others, and the deepest completed iteration gives the move, ties
+    going to the unperturbed process. The table is kept across searches.
+    """
+
+    def __init__(self, layout, depth=6, processes=None, table_size=1 << 20,
+                 **options):
+        """
+        Arguments:
+            layout: the layout of the game.
+            depth: the number of (Pacman, ghost) move pairs to search.
+            processes: the number of worker processes, by default the
+                number of CPUs.
+            table_size: the number of slots of the shared table.
+            options: keyword arguments of `alphabeta.AlphaBeta`.
+        """
+        self.game = CompactGame.forLayout(layout)
+        self.depth = depth
+        self.processes = processes or multiprocessing.cpu_count()
+        self.tt = SharedTranspositionTable(self.game, table_size)
+        self.stop = multiprocessing.Event()
+        self.pool = multiprocessing.Pool(
+            self.processes, _init_smp_worker,
+            (layout.layoutText, layout.getTables(), table_size, self.tt.name,
+             self.stop, options))
+        self.nodes = 0
+        self.completed = []
+
+    def search(self, root):
+        """Searches a compact state, Pacman to move.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+
+        Return:
+            A tuple containing the value of the root and the direction
+            index of the best Pacman move.
+        """
+        self.stop.clear()
+        results = self.pool.map(
+            _smp_search, [(root, self.depth, index)
+                          for index in range(self.processes)],
+            chunksize=1)
+        self.nodes = sum(result[4] for result in results)
+        self.completed = [result[1] for result in results]
+        _, _, value, direction, _ = max(
+            results, key=lambda result: (result[1], -result[0]))
+        return value, direction
+
+    def close(self):
+        """Stops the worker processes and frees the shared table."""
+        self.pool.close()
+        self.pool.join()
+        self.tt.close()
+
+
+class PacmanAgent(Agent):
+    """Pacman agent based on principal variation search with futility
+    pruning, split at the root over a process pool (see
+    `RootSplitSearch`), or run by several processes sharing a table with
+    `lazy_smp` (see `LazySMP`). The pool is started on the first move and
+    kept until the end of the game (`final`).
+
+    The pool is opt-in: with the default `processes=1`, the search runs in
+    the agent's process. Its speedups have only been measured on a single
+    CPU, where they are pure overhead."""
+
+    def __init__(self, depth=6, processes=1, lazy_smp=False):
+        """
+        Arguments:
+            depth: the number of (Pacman, ghost) move pairs to search.
+            processes: the number of worker processes, None for the
+                number of CPUs, 1 to search without a pool.
+            lazy_smp: whether the workers run Lazy SMP rather than a
+                root split.
+        """
+        super().__init__()
+        self.depth = depth
+        self.processes = processes
+        self.lazy_smp = lazy_smp
+        self.search = None
+
+    def get_action(self, state):
+        """Given a Pacman game state, returns a legal move.
+
+        Arguments:
+            state: a game state. See API or class `pacman.GameState`.
+
+        Return:
+            A legal move as defined in `game.Directions`.
+        """
+        game = CompactGame.forLayout(state.data.layout)
+        if self.processes == 1:
+            engine = AlphaBeta(game, self.depth, pvs=True, futility=True)
+            _, direction = engine.search(game.fromState(state))
+            GameState.addExpandedNodes(engine.nodes)
+            return game.direction(direction)
+        if self.search is None or self.search.game is not game:
+            if self.search is not None:
+                self.search.close()
+            search_class = LazySMP if self.lazy_smp else RootSplitSearch
+            self.search = search_class(state.data.layout, self.depth,
+                                       self.processes, pvs=True,
+                                       futility=True)
+        _, direction = self.search.search(game.fromState(state))
+        GameState.addExpandedNodes(self.search.nodes)
+        return game.direction(direction)
+
+    def final(self, state):
+        """Stops the worker processes at the end of the game.
+
+        Arguments:
+            state: the final game state.
+        """
+        if self.search is not None:
+            self.search.close()
+            self.search = None
@@ -0,0 +1,246 @@
+from pacman_module.game import Directions
+from pacman_module.compactGame import (
+    NUM_HEADINGS,
+    ONGOING,
+    WIN,
+    LOSE,
+)
+from pacman_module.compiledLayout import DIRECTION_INDEX
+
+STOP = DIRECTION_INDEX[Directions.STOP]
+
+# Questions: can Pacman force a win, can the ghost force a capture
+PACMAN_WINS = 'win'
+GHOST_CAPTURES = 'capture'
+
+# Results
+PROVEN = 1
+DISPROVEN = -1
+UNKNOWN = 0
+
+# Proof and disproof numbers of decided nodes
+INF = 1 << 40
+
+
+class ProofNumberSearch:
+    """Proof-number search over compact states with a single ghost, deciding
+    whether one side can force its outcome against any play of the other:
+    Pacman eating all the dots before being caught, or the ghost catching
+    Pacman.
+
+    The attacker moves at OR nodes, the defender at AND nodes. A position
+    repeating one of its ancestors (same side to move) is disproven: if the
+    attacker can force its outcome, it can do so without repetitions. Nodes
+    are not merged by transposition, which keeps repetitions exact; proven
+    subtrees do not depend on the path, so the positions of a proof are
+    cached across searches (`winning_moves`, `lost`).
+
+    Unlike the compact searches, Pacman may stop, as in the actual game:
+    a capture is only proven if stopping does not save Pacman either.
+    Nodes are stored in parallel lists, indexed from 0 (the root).
+    """
+
+    def __init__(self, game, max_nodes=5000):
+        """
+        Arguments:
+            game: a `compactGame.CompactGame`.
+            max_nodes: the node budget of each question.
+        """
+        self.game = game
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        # Pacman-to-move positions proven won, with a winning direction
+        self.winning_moves = {}
+        # Pacman-to-move positions proven lost
+        self.lost = set()
+
+    def _reset(self):
+        self.pn = []
+        self.dn = []
+        self.parent = []
+        self.children = []
+        # (pacman to move, pacman, ghost, food)
+        self.state = []
+        # Direction of a Pacman move, ghost state of a ghost move
+        self.move = []
+
+    def _add(self, parent, state, move, outcome, attacker_is_pacman):
+        """Adds a node and sets its proof and disproof numbers."""
+        node = len(self.pn)
+        self.parent.append(parent)
+        self.children.append(None)
+        self.state.append(state)
+        self.move.append(move)
+        if outcome == WIN:
+            proven = attacker_is_pacman
+        elif outcome == LOSE:
+            proven = not attacker_is_pacman
+        elif self._repeats(parent, state):
+            proven = False
+        else:
+            proven = None
+        if proven is None:
+            self.pn.append(self._initial_pn(state, attacker_is_pacman))
+            self.dn.append(1)
+        elif proven:
+            self.pn.append(0)
+            self.dn.append(INF)
+        else:
+            self.pn.append(INF)
+            self.dn.append(0)
+        return node
+
+    def _initial_pn(self, state, attacker_is_pacman):
+        """Returns the proof number of a new leaf: the dots left to eat, or
+        the maze distance the ghost has to close."""
+        _, pacman, ghost, food = state
+        if attacker_is_pacman:
+            return bin(food).count('1')
+        return int(self.game.distances[pacman, ghost // NUM_HEADINGS])
+
+    def _repeats(self, node, state):
+        while node >= 0:
+            if self.state[node] == state:
+                return True
+            node = self.parent[node]
+        return False
+
+    def pacman_moves(self, pacman, ghost, food):
+        """Returns the Pacman moves of a state as (direction, pacman, food,
+        outcome), stopping included."""
+        game = self.game
+        moves = [(STOP, pacman, food, ONGOING)]
+        for _, direction in game.pacmanSuccessors[pacman]:
+            target, child_food, _, outcome = game.pacmanStep(
+                pacman, ghost, food, direction)
+            moves.append((direction, target, child_food, outcome))
+        return moves
+
+    def _expand(self, node, attacker_is_pacman):
+        game = self.game
+        pacman_turn, pacman, ghost, food = self.state[node]
+        children = []
+        if pacman_turn:
+            for direction, target, child_food, outcome in \
+                    self.pacman_moves(pacman, ghost, food):
+                children.append(self._add(
+                    node, (False, target, ghost, child_food), direction,
+                    outcome, attacker_is_pacman))
+        else:
+            for child, _, outcome in game.ghostStep(pacman, ghost):
+                children.append(self._add(
+                    node, (True, pacman, child, food), child, outcome,
+                    attacker_is_pacman))
+        self.children[node] = children
+
+    def _is_or(self, node, attacker_is_pacman):
+        return self.state[node][0] == attacker_is_pacman
+
+    def _update(self, node, attacker_is_pacman):
+        """Recomputes the proof and disproof numbers of `node` and its
+        ancestors, stopping when they do not change."""
+        while node >= 0:
+            children = self.children[node]
+            pns = [self.pn[c] for c in children]
+            dns = [self.dn[c] for c in children]
+            if self._is_or(node, attacker_is_pacman):
+                pn, dn = min(pns), min(sum(dns), INF)
+            else:
+                pn, dn = min(sum(pns), INF), min(dns)
+            if pn == self.pn[node] and dn == self.dn[node]:
+                return
+            self.pn[node], self.dn[node] = pn, dn
+            node = self.parent[node]
+
+    def _most_proving(self, attacker_is_pacman):
+        node = 0
+        while self.children[node] is not None:
+            if self._is_or(node, attacker_is_pacman):
+                node = min(self.children[node], key=self.pn.__getitem__)
+            else:
+                node = min(self.children[node], key=self.dn.__getitem__)
+        return node
+
+    def prove(self, root, question):
+        """Runs a proof-number search of `question` from a compact state,
+        Pacman to move.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+            question: PACMAN_WINS or GHOST_CAPTURES.
+
+        Return:
+            PROVEN, DISPROVEN or UNKNOWN (the node budget ran out).
+        """
+        attacker_is_pacman = question == PACMAN_WINS
+        self._reset()
+        self._add(-1, (True,) + tuple(root), None, ONGOING,
+                  attacker_is_pacman)
+        while self.pn[0] and self.dn[0] and len(self.pn) < self.max_nodes:
+            node = self._most_proving(attacker_is_pacman)
+            self._expand(node, attacker_is_pacman)
+            self._update(node, attacker_is_pacman)
+        self.nodes += len(self.pn)
+        if self.pn[0] == 0:
+            self._record_proof(attacker_is_pacman)
+            return PROVEN
+        return DISPROVEN if self.dn[0] == 0 else UNKNOWN
+
+    def _record_proof(self, attacker_is_pacman):
+        """Caches the Pacman-to-move positions of the proof tree."""
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            children = self.children[node]
+            if children is None:
+                continue
+            pacman_turn, pacman, ghost, food = self.state[node]
+            if self._is_or(node, attacker_is_pacman):
+                child = next(c for c in children if self.pn[c] == 0)
+                stack.append(child)
+                if pacman_turn:
+                    self.winning_moves[(pacman, ghost, food)] = \
+                        self.move[child]
+            else:
+                stack.extend(children)
+                if pacman_turn:
+                    self.lost.add((pacman, ghost, food))
+
+    def delaying_move(self, root):
+        """Returns the direction of a Pacman move from `root` that is not
+        caught at once and ends farthest from the ghost, the move of a lost
+        position."""
+        game = self.game
+        pacman, ghost, food = root
+        best, best_direction = None, None
+        for direction, target, _, outcome in \
+                self.pacman_moves(pacman, ghost, food):
+            safe = outcome != LOSE and all(
+                child_outcome == ONGOING
+                for _, _, child_outcome in game.ghostStep(target, ghost))
+            key = (safe, int(game.distances[target, ghost // NUM_HEADINGS]))
+            if best is None or key > best:
+                best, best_direction = key, direction
+        return best_direction
+
+    def solve(self, root):
+        """Decides a compact state, Pacman to move, within the node budget
+        of each question.
+
+        Arguments:
+            root: a compact state (pacman, ghost, food).
+
+        Return:
+            A tuple (outcome, direction): WIN and a winning direction, LOSE
+            and a delaying direction, or (None, None) if the position is
+            not decided.
+        """
+        root = tuple(root)
+        if root not in self.winning_moves and root not in self.lost:
+            if self.prove(root, PACMAN_WINS) != PROVEN:
+                self.prove(root, GHOST_CAPTURES)
+        if root in self.winning_moves:
+            return WIN, self.winning_moves[root]
+        if root in self.lost:
+            return LOSE, self.delaying_move(root)
+        return None, None
@@ -67,9 +67,10 @@ if __name__ == '__main__':
     random.seed(args.seed)
     np.random.seed(args.seed)
 
+    pacman = importlib.import_module(args.agent).PacmanAgent()
     score, time, nodes = runGame(
         layout_name=args.layout,
-        pacman=importlib.import_module(args.agent).PacmanAgent(),
+        pacman=pacman,
         ghosts=[GHOSTS[args.ghost](1)],
         beliefstateagent=None,
         displayGraphics=not args.nographics,
@@ -80,3 +81,5 @@ if __name__ == '__main__':
     print(f"Score: {score}")
     print(f"Computation time: {time}")
     print(f"Expanded nodes: {nodes}")
+    if getattr(pacman, 'ponder', False):
+        print(f"Pondering time: {pacman.ponder_time}")
@@ -0,0 +1,51 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from ghost_model import GHOST_TABLES
+from expectimax import Expectimax, NO_PRUNING, STAR1, STAR2
+from helpers import random_states
+
+# Compare the nodes searched by naive expectimax, Star1 and Star2 against
+# EastRandyGhost on random positions of every shipped layout, checking
+# that the pruned searches return the same root values.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+depths = [2, 3, 4]
+states_per_layout = 10
+
+
+random.seed(0)
+mismatches = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    game = CompactGame.forLayout(lay)
+    table = GHOST_TABLES['eastrandy'](game)
+    states = random_states(lay, states_per_layout)
+    for depth in depths:
+        nodes = {NO_PRUNING: 0, STAR1: 0, STAR2: 0}
+        times = {NO_PRUNING: 0, STAR1: 0, STAR2: 0}
+        for state in states:
+            root = game.fromState(state)
+            values = {}
+            for pruning in nodes:
+                engine = Expectimax(game, table, depth, pruning)
+                start = time.perf_counter()
+                values[pruning], _ = engine.search(root)
+                times[pruning] += time.perf_counter() - start
+                nodes[pruning] += engine.nodes
+            for pruning in (STAR1, STAR2):
+                if abs(values[pruning] - values[NO_PRUNING]) > 1e-6:
+                    mismatches += 1
+                    print(f'{layout_name} depth {depth} {pruning}: '
+                          f'{values[pruning]} != {values[NO_PRUNING]}')
+        print(f'{layout_name} depth {depth}: ' + ', '.join(
+            f'{pruning} {nodes[pruning]} nodes {times[pruning]:.2f}s'
+            for pruning in nodes), flush=True)
+
+print(f'{mismatches} mismatches')
+sys.exit(1 if mismatches else 0)
@@ -0,0 +1,62 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from alphabeta import AlphaBeta, INF
+from helpers import random_position
+
+# Compare danger extensions with uniform depths on positions where the
+# ghost is close to Pacman. The accuracy of a search is measured by its
+# regret: how much worse its move is than the best one, both valued by a
+# reference search `reference_depth` move pairs deep.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+positions_per_layout = 100
+danger_distance = 3
+reference_depth = 6
+configs = {
+    'depth 3': {'depth': 3},
+    'depth 3 + extensions': {'depth': 3, 'extensions': True},
+    'depth 4': {'depth': 4},
+    'depth 4 + extensions': {'depth': 4, 'extensions': True},
+    'depth 5': {'depth': 5},
+}
+
+
+def move_values(engine, root):
+    """Returns the value of each Pacman move of `root`."""
+    pacman, ghost, food = root
+    values = {}
+    for _, over, direction, target, child_food, child_score in \
+            engine._pacman_moves(pacman, ghost, food, 0):
+        values[direction] = child_score if over else engine._min_value(
+            target, ghost, child_food, child_score, engine.depth, -INF, INF)
+    return values
+
+
+random.seed(2)
+for layout_name in layouts:
+    game = CompactGame.forLayout(layout.getLayout(layout_name))
+    roots = [random_position(game, min_distance=2,
+                             max_distance=danger_distance)
+             for _ in range(positions_per_layout)]
+    reference = AlphaBeta(game, reference_depth, pvs=True, futility=True)
+    reference_values = [move_values(reference, root) for root in roots]
+    for name, options in configs.items():
+        engine = AlphaBeta(game, pvs=True, futility=True, **options)
+        nodes = regret = errors = 0
+        start = time.perf_counter()
+        for root, values in zip(roots, reference_values):
+            _, direction = engine.search(root)
+            nodes += engine.nodes
+            loss = max(values.values()) - values[direction]
+            regret += loss
+            errors += loss > 0
+        print(f'{layout_name} {name}: {nodes} nodes '
+              f'{time.perf_counter() - start:.2f}s, mean regret '
+              f'{regret / len(roots):.2f}, suboptimal moves {errors}/'
+              f'{len(roots)}', flush=True)
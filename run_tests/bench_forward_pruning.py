@@ -0,0 +1,57 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from alphabeta import AlphaBeta
+from helpers import random_position
+
+# Compare futility pruning, razoring and late move reductions, alone and
+# together, with plain PVS: nodes searched, nodes pruned by each technique,
+# and how often the root value and move differ. Futility pruning uses
+# sound bounds and must not change the root value.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+positions_per_layout = 200
+depth = 4
+configs = {
+    'pvs': {},
+    'futility': {'futility': True},
+    'razoring': {'razoring': True},
+    'lmr': {'lmr': True},
+    'all': {'futility': True, 'razoring': True, 'lmr': True},
+}
+
+random.seed(1)
+failures = 0
+for layout_name in layouts:
+    game = CompactGame.forLayout(layout.getLayout(layout_name))
+    roots = [random_position(game) for _ in range(positions_per_layout)]
+    reference = []
+    for name, options in configs.items():
+        engine = AlphaBeta(game, depth, pvs=True, **options)
+        nodes = 0
+        pruned = dict.fromkeys(engine.pruned, 0)
+        value_diff = move_diff = 0
+        start = time.perf_counter()
+        for i, root in enumerate(roots):
+            value, direction = engine.search(root)
+            nodes += engine.nodes
+            for key, count in engine.pruned.items():
+                pruned[key] += count
+            if name == 'pvs':
+                reference.append((value, direction))
+                continue
+            value_diff += value != reference[i][0]
+            move_diff += direction != reference[i][1]
+        if name == 'futility' and value_diff:
+            failures += 1
+        print(f'{layout_name} {name}: {nodes} nodes '
+              f'{time.perf_counter() - start:.2f}s, pruned {pruned}, '
+              f'value differs {value_diff}, move differs {move_diff} '
+              f'of {len(roots)}', flush=True)
+
+sys.exit(1 if failures else 0)
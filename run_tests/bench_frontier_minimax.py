@@ -0,0 +1,91 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from frontier_minimax import FrontierMinimax
+from alphabeta import AlphaBeta
+import martin
+from helpers import random_states
+
+# Check the root values of the frontier-batched minimax against a plain
+# recursive minimax over GameState with the same leaf evaluation, and
+# against the compact alpha-beta engine at greater depths, then time it
+# against martin's alpha-beta search at the same depth.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+check_depth = 2
+alphabeta_depths = [3, 4]
+bench_depths = [2, 3, 4, 5]
+states_per_layout = 20
+
+
+def reference(state, game, engine, depth, agent_index, score):
+    if state.isWin() or state.isLose():
+        return float(score + state.getScore() - reference.root_score)
+    if depth == 0:
+        pacman, ghost, food = game.fromState(state)
+        return engine.evaluate_one(pacman, ghost, food,
+                                   state.getScore() - reference.root_score,
+                                   False)
+    actions = [a for a in state.getLegalActions(agent_index) if a != 'Stop']
+    values = []
+    for action in actions:
+        child = state.generateSuccessor(agent_index, action)
+        values.append(reference(child, game, engine,
+                                depth - agent_index, 1 - agent_index, 0))
+    return max(values) if agent_index == 0 else min(values)
+
+
+random.seed(0)
+mismatches = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    game = CompactGame.forLayout(lay)
+    engine = FrontierMinimax(game, check_depth)
+    states = random_states(lay, states_per_layout)
+    for state in states:
+        reference.root_score = state.getScore()
+        expected = reference(state, game, engine, check_depth, 0, 0)
+        actual, _ = engine.search(game.fromState(state))
+        if expected != actual:
+            mismatches += 1
+            print(f'{layout_name}: expected {expected}, got {actual}')
+    print(f'{layout_name}: checked {len(states)} roots at depth '
+          f'{check_depth}')
+    for depth in alphabeta_depths:
+        engine = FrontierMinimax(game, depth)
+        reference_engine = AlphaBeta(game, depth)
+        for state in states:
+            root = game.fromState(state)
+            expected, _ = reference_engine.search(root)
+            actual, _ = engine.search(root)
+            if abs(expected - actual) > 1e-6:
+                mismatches += 1
+                print(f'{layout_name} depth {depth}: alpha-beta {expected}, '
+                      f'got {actual}')
+        print(f'{layout_name}: checked {len(states)} roots against '
+              f'alpha-beta at depth {depth}', flush=True)
+
+    state = states[0]
+    for depth in bench_depths:
+        engine = FrontierMinimax(game, depth)
+        start = time.perf_counter()
+        engine.search(game.fromState(state))
+        frontier_time = time.perf_counter() - start
+        line = (f'{layout_name} depth {depth}: frontier {engine.nodes} nodes '
+                f'{frontier_time:.3f}s')
+        if depth <= 4:
+            agent = martin.PacmanAgent()
+            agent.initial_state = state
+            agent.depth = depth
+            start = time.perf_counter()
+            agent.minimax(state)
+            line += f', alpha-beta {time.perf_counter() - start:.3f}s'
+        print(line)
+
+print(f'{mismatches} mismatches')
+sys.exit(1 if mismatches else 0)
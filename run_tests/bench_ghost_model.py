@@ -0,0 +1,40 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.ghostAgents import DumbyGhost, GreedyGhost, SmartyGhost
+from ghost_model import GhostModel
+import martin
+from helpers import play
+
+# Play capped games of martin's agent against each deterministic ghost,
+# without and with the matching ghost model, and report the outcome, the
+# search time per move and the accuracy of the model's predictions.
+ghosts = [DumbyGhost, GreedyGhost, SmartyGhost]
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+max_moves = 100
+runs = [(4, False), (4, True), (6, True)]
+
+
+for ghost_class in ghosts:
+    for layout_name in layouts:
+        lay = layout.getLayout(layout_name)
+        for depth, use_model in runs:
+            agent = martin.PacmanAgent()
+            agent.depth = depth
+            if use_model:
+                agent.ghost_model = GhostModel(ghost_class)
+            state, moves, search_time, _ = play(lay, agent, ghost_class(1),
+                                                max_moves)
+            per_move = search_time / moves
+            model = agent.ghost_model
+            outcome = 'win' if state.isWin() else \
+                'loss' if state.isLose() else 'capped'
+            line = (f'{ghost_class.__name__} {layout_name} depth {depth} '
+                    f'model {use_model}: {outcome} score {state.getScore()} '
+                    f'moves {moves} {per_move * 1000:.1f} ms/move')
+            if model is not None:
+                line += f' accuracy {model.accuracy():.2f}'
+            print(line, flush=True)
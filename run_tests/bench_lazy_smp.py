@@ -0,0 +1,100 @@
+import multiprocessing
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module.layout import Layout
+from pacman_module.compactGame import CompactGame
+from alphabeta import AlphaBeta, TranspositionTable
+from parallel_search import LazySMP
+from helpers import random_position
+
+# Time-to-depth of Lazy SMP for several numbers of processes on generated
+# large layouts, against the sequential iterative deepening search with a
+# private table. The shared table is cleared before each position, so
+# that only the table filled during the search itself helps.
+sizes = [(31, 15), (41, 21)]
+num_food = 12
+wall_density = 0.25
+depth = 10
+process_counts = [1, 2, 4, 8, 16]
+positions = 5
+options = {'pvs': True, 'futility': True, 'aspiration': 20}
+
+
+def generate_layout(width, height, rng):
+    """Returns the text of a random connected layout with `num_food` dots,
+    Pacman and one ghost."""
+    cells = [(x, y) for y in range(1, height - 1) for x in range(1, width - 1)
+             if rng.random() >= wall_density]
+    # Keep the largest connected part of the maze
+    free = set(cells)
+    parts = []
+    while free:
+        stack = [free.pop()]
+        part = set(stack)
+        while stack:
+            x, y = stack.pop()
+            for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if cell in free:
+                    free.remove(cell)
+                    part.add(cell)
+                    stack.append(cell)
+        parts.append(part)
+    maze = sorted(max(parts, key=len))
+    rows = [['%'] * width for _ in range(height)]
+    for x, y in maze:
+        rows[y][x] = ' '
+    picked = rng.sample(maze, num_food + 2)
+    for x, y in picked[:num_food]:
+        rows[y][x] = '.'
+    rows[picked[-2][1]][picked[-2][0]] = 'P'
+    rows[picked[-1][1]][picked[-1][0]] = 'G'
+    return [''.join(row) for row in rows]
+
+
+if __name__ == '__main__':
+    print(f'{multiprocessing.cpu_count()} CPUs', flush=True)
+    rng = random.Random(0)
+    for width, height in sizes:
+        lay = Layout(generate_layout(width, height, rng))
+        game = CompactGame.forLayout(lay)
+        roots = [random_position(game, rng, min_distance=4)
+                 for _ in range(positions)]
+
+        moves = []
+        nodes = 0
+        start = time.perf_counter()
+        for root in roots:
+            engine = AlphaBeta(game, depth, tt=TranspositionTable(),
+                               iterative=True, **options)
+            moves.append(engine.search(root)[1])
+            nodes += engine.nodes
+        sequential = time.perf_counter() - start
+        print(f'{width}x{height} ({game.numCells} cells) depth {depth}: '
+              f'sequential {1000 * sequential / positions:.0f} ms/search, '
+              f'{nodes // positions} nodes/search', flush=True)
+
+        for processes in process_counts:
+            search = LazySMP(lay, depth, processes, table_size=1 << 18,
+                             **options)
+            # Untimed warm-up, as the agent keeps its pool for the game
+            search.search(roots[0])
+            nodes = same = helpers = 0
+            elapsed = 0.0
+            for root, move in zip(roots, moves):
+                search.tt.clear()
+                start = time.perf_counter()
+                same += search.search(root)[1] == move
+                elapsed += time.perf_counter() - start
+                nodes += search.nodes
+                helpers += sum(d == depth for d in search.completed[1:])
+            search.close()
+            print(f'    {processes:2d} processes: '
+                  f'{1000 * elapsed / positions:.0f} ms/search, speedup '
+                  f'{sequential / elapsed:.2f}, {nodes // positions} '
+                  f'nodes/search, same move {same}/{positions}, helpers '
+                  f'completing the depth {helpers}', flush=True)
@@ -0,0 +1,62 @@
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.pacman import GameState
+from pacman_module.ghostAgents import GreedyGhost, SmartyGhost, \
+    EastRandyGhost
+import martin
+from helpers import play
+
+# Compare martin's agent with and without macro-actions, in games capped
+# at `max_moves` Pacman moves, on small_adv and on a layout made of long
+# corridors only, where macro-actions span the most moves. Reports the
+# outcome, the expanded nodes and the search time per move.
+ghosts = [GreedyGhost, SmartyGhost, EastRandyGhost]
+depths = [2, 4]
+max_moves = 200
+
+
+def corridor_layout(width, height, dots):
+    """Returns a layout whose free cells are the border of a rectangle and
+    its middle column, with dots at the (x, y) positions `dots`."""
+    rows = [['%'] * width for _ in range(height)]
+    for x in range(1, width - 1):
+        rows[1][x] = rows[height - 2][x] = ' '
+    for y in range(1, height - 1):
+        rows[y][1] = rows[y][width - 2] = rows[y][width // 2] = ' '
+    for x, y in dots:
+        rows[y][x] = '.'
+    rows[1][1] = 'P'
+    rows[height - 2][width // 2 + 3] = 'G'
+    return layout.Layout([''.join(row) for row in rows])
+
+
+layouts = [('small_adv', layout.getLayout('small_adv')),
+           ('corridors', corridor_layout(31, 11, [(8, 1), (22, 1), (29, 5),
+                                                  (1, 7), (15, 4), (8, 9),
+                                                  (22, 9)]))]
+
+for ghost_class in ghosts:
+    for layout_name, lay in layouts:
+        for depth in depths:
+            for macro_actions in (False, True):
+                random.seed(0)
+                agent = martin.PacmanAgent()
+                agent.depth = depth
+                agent.macro_actions = macro_actions
+                GameState.countExpanded = 0
+                state, moves, search_time, _ = play(lay, agent,
+                                                    ghost_class(1),
+                                                    max_moves)
+                outcome = 'win' if state.isWin() else \
+                    'loss' if state.isLose() else 'capped'
+                print(f'{ghost_class.__name__} {layout_name} depth {depth} '
+                      f'macro={macro_actions}: {outcome} score '
+                      f'{state.getScore()} moves {moves}, '
+                      f'{GameState.countExpanded} nodes, '
+                      f'{1000 * search_time / moves:.1f} ms/move',
+                      flush=True)
@@ -0,0 +1,67 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import CompactGame
+from pacman_module.ghostAgents import GreedyGhost, EastRandyGhost
+from ghost_model import GHOST_TABLES
+from mcts import MCTS
+import mcts
+import martin
+from helpers import play
+
+# Report the rollout throughput of the MCTS engine, then the win rate of
+# the MCTS agent for several time budgets per move against martin's
+# minimax agent, in games capped at `max_moves` Pacman moves.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+ghosts = [GreedyGhost, EastRandyGhost]
+time_limits = [0.01, 0.03, 0.1]
+games = 5
+max_moves = 100
+
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    state = GameState()
+    state.initialize(lay, 1)
+    game = CompactGame.forLayout(lay)
+    engine = MCTS(game, GHOST_TABLES['eastrandy'](game))
+    start = time.perf_counter()
+    engine.search(game.fromState(state), time_limit=1.0)
+    elapsed = time.perf_counter() - start
+    rollouts = 0
+    start = time.perf_counter()
+    pacman, ghost, food = game.fromState(state)
+    while time.perf_counter() - start < 1.0:
+        engine.simulator.rollout(pacman, ghost, food, engine.horizon)
+        rollouts += 1
+    print(f'{layout_name}: {engine.playouts / elapsed:.0f} playouts/s '
+          f'(tree search), {rollouts / (time.perf_counter() - start):.0f} '
+          f'rollouts/s (simulator alone)', flush=True)
+
+
+for ghost_class in ghosts:
+    for layout_name in layouts:
+        lay = layout.getLayout(layout_name)
+        agents = [('minimax', lambda seed: martin.PacmanAgent())] + [
+            (f'mcts {limit}s', lambda seed, limit=limit:
+             mcts.PacmanAgent(time_limit=limit, seed=seed))
+            for limit in time_limits]
+        for name, make_agent in agents:
+            wins = 0
+            scores = 0
+            start = time.perf_counter()
+            for seed in range(games):
+                random.seed(seed)
+                state, _, _, _ = play(lay, make_agent(seed), ghost_class(1),
+                                      max_moves)
+                wins += state.isWin()
+                scores += state.getScore()
+            print(f'{ghost_class.__name__} {layout_name} {name}: '
+                  f'win rate {wins}/{games}, mean score '
+                  f'{scores / games:.0f}, '
+                  f'{time.perf_counter() - start:.1f}s', flush=True)
@@ -0,0 +1,55 @@
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.ghostAgents import GreedyGhost, SmartyGhost, \
+    EastRandyGhost
+import alphabeta
+from helpers import play
+
+# Compare the alphabeta agent with and without pondering, in games capped
+# at `max_moves` Pacman moves. Charged time is the time spent in Pacman's
+# `get_action`; ghost time is the time spent in the ghost's, which the
+# pondering thread competes with for the interpreter lock. Pondering pays
+# off when the game leaves the interpreter idle between two Pacman moves,
+# as the graphical display does while it animates a move: `frame_times`
+# simulates that with a sleep after each ghost move.
+layouts = ['medium_adv', 'large_adv']
+ghosts = [GreedyGhost, SmartyGhost, EastRandyGhost]
+games = 3
+max_moves = 100
+depth = 6
+frame_times = [0.0, 0.01]
+
+
+for ghost_class in ghosts:
+    for layout_name in layouts:
+        lay = layout.getLayout(layout_name)
+        for frame_time, ponder in [(f, p) for f in frame_times
+                                   for p in (False, True)]:
+            moves = ghost_time = charged = pondered = score = 0
+            hits = misses = 0
+            for seed in range(games):
+                random.seed(seed)
+                agent = alphabeta.PacmanAgent(depth=depth, ponder=ponder)
+                state, n, _, g = play(lay, agent, ghost_class(1), max_moves,
+                                      frame_time)
+                moves += n
+                ghost_time += g
+                score += state.getScore()
+                charged += agent.search_time
+                pondered += agent.ponder_time
+                hits += agent.ponder_hits
+                misses += agent.ponder_misses
+            line = (f'{ghost_class.__name__} {layout_name} '
+                    f'frame {frame_time}s ponder={ponder}: '
+                    f'{1000 * charged / moves:.2f} ms/move '
+                    f'charged, {1000 * ghost_time / moves:.2f} ms/move '
+                    f'ghost, mean score {score / games:.0f}')
+            if ponder:
+                line += (f', {1000 * pondered / moves:.2f} ms/move '
+                         f'pondered, hits {hits}/{hits + misses}')
+            print(line, flush=True)
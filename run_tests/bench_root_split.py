@@ -0,0 +1,56 @@
+import multiprocessing
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from alphabeta import AlphaBeta
+from parallel_search import RootSplitSearch
+from helpers import random_position
+
+# Compare the sequential search with the root-split search over pools of
+# several sizes on random positions, reporting the speedup in wall time
+# and checking that the root values agree. The pool is started before
+# timing, as the agent keeps it for the whole game.
+layout_name = 'large_adv'
+depths = [6, 8]
+pool_sizes = [1, 2, 4, 8]
+positions = 20
+options = {'pvs': True, 'futility': True}
+
+
+if __name__ == '__main__':
+    print(f'{multiprocessing.cpu_count()} CPUs', flush=True)
+    random.seed(0)
+    lay = layout.getLayout(layout_name)
+    game = CompactGame.forLayout(lay)
+    roots = [random_position(game) for _ in range(positions)]
+    for depth in depths:
+        engine = AlphaBeta(game, depth, **options)
+        values = []
+        nodes = 0
+        start = time.perf_counter()
+        for root in roots:
+            values.append(engine.search(root)[0])
+            nodes += engine.nodes
+        sequential = time.perf_counter() - start
+        print(f'{layout_name} depth {depth}: sequential '
+              f'{1000 * sequential / positions:.1f} ms/search, '
+              f'{nodes // positions} nodes/search', flush=True)
+        for processes in pool_sizes:
+            search = RootSplitSearch(lay, depth, processes, **options)
+            nodes = mismatches = 0
+            start = time.perf_counter()
+            for root, value in zip(roots, values):
+                mismatches += search.search(root)[0] != value
+                nodes += search.nodes
+            elapsed = time.perf_counter() - start
+            search.close()
+            print(f'    {processes} processes: '
+                  f'{1000 * elapsed / positions:.1f} ms/search, speedup '
+                  f'{sequential / elapsed:.2f}, {nodes // positions} '
+                  f'nodes/search, {mismatches} mismatches', flush=True)
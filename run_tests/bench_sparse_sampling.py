@@ -0,0 +1,66 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from ghost_model import GHOST_TABLES
+from expectimax import Expectimax, SparseSampling, NO_PRUNING
+from helpers import random_states
+
+# Compare sparse sampling with exact expectimax against stochastic ghosts:
+# nodes searched, mean absolute error of the root value and agreement of
+# the chosen move, for several sampling widths. Also checks that searches
+# with a same seed are reproducible.
+layouts = ['medium_adv', 'large_adv']
+ghosts = {
+    'eastrandy': lambda game: GHOST_TABLES['eastrandy'](game),
+    'greedy(0.8)': lambda game: GHOST_TABLES['greedy'](game, 0.8),
+}
+depth = 4
+widths = [1, 2, 4, 8]
+states_per_layout = 10
+
+
+random.seed(0)
+failures = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    game = CompactGame.forLayout(lay)
+    states = random_states(lay, states_per_layout)
+    roots = [game.fromState(state) for state in states]
+    for ghost_name, make_table in ghosts.items():
+        table = make_table(game)
+        exact = []
+        nodes = 0
+        start = time.perf_counter()
+        for root in roots:
+            engine = Expectimax(game, table, depth, NO_PRUNING)
+            exact.append(engine.search(root))
+            nodes += engine.nodes
+        print(f'{layout_name} {ghost_name} exact: {nodes} nodes '
+              f'{time.perf_counter() - start:.2f}s')
+        for width in widths:
+            nodes = 0
+            error = 0
+            agree = 0
+            start = time.perf_counter()
+            for root, (value, direction) in zip(roots, exact):
+                engine = SparseSampling(game, table, depth, width, seed=1)
+                sampled = engine.search(root)
+                nodes += engine.nodes
+                error += abs(sampled[0] - value)
+                agree += sampled[1] == direction
+                if SparseSampling(game, table, depth, width,
+                                  seed=1).search(root) != sampled:
+                    failures += 1
+                    print('Search is not reproducible')
+            print(f'{layout_name} {ghost_name} width {width}: {nodes} nodes '
+                  f'{time.perf_counter() - start:.2f}s, mean error '
+                  f'{error / len(roots):.1f}, same move '
+                  f'{agree}/{len(roots)}', flush=True)
+
+sys.exit(1 if failures else 0)
@@ -0,0 +1,96 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import CompactGame, ONGOING
+from alphabeta import AlphaBeta, TranspositionTable
+from ghost_model import GHOST_TABLES
+
+# Measure the nodes saved by keeping the transposition table from one move
+# to the next. Games are played on compact states by the persistent-table
+# engine against ghosts sampled from the `ghost_model` tables; at every
+# position, the same search is repeated with a fresh table and without
+# any table. All engines search `depth` move pairs with PVS, aspiration
+# windows and futility pruning. Values may differ from the search without
+# a table when an entry searched deeper than needed produces a cutoff.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+ghosts = ['greedy', 'smarty', 'eastrandy']
+games_per_config = 3
+max_moves = 100
+depth = 6
+aspiration = 20
+
+
+def sample_ghost(game, table, pacman, ghost, rng):
+    """Returns a ghost successor sampled from a move table."""
+    probs = table[ghost, min(pacman, table.shape[1] - 1)]
+    steps = game.ghostStep(pacman, ghost)
+    u = rng.random() * sum(probs[:len(steps)])
+    for k, step in enumerate(steps):
+        u -= probs[k]
+        if u < 0:
+            return step
+    return steps[-1]
+
+
+def search(game, root, guess, tt, iterative):
+    engine = AlphaBeta(game, depth, pvs=True, aspiration=aspiration,
+                       futility=True, tt=tt, iterative=iterative)
+    start = time.perf_counter()
+    value, direction = engine.search(root, guess)
+    return engine, value, direction, time.perf_counter() - start
+
+
+rng = random.Random(0)
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    state = GameState()
+    state.initialize(lay, 1)
+    game = CompactGame.forLayout(lay)
+    for ghost_name in ghosts:
+        table = GHOST_TABLES[ghost_name](game)
+        totals = {'reuse': [0, 0.0], 'fresh': [0, 0.0], 'none': [0, 0.0]}
+        moves = pv_hits = mismatches = 0
+        for _ in range(games_per_config):
+            pacman, ghost, food = game.fromState(state)
+            tt = TranspositionTable()
+            guess, variation = None, []
+            for _ in range(max_moves):
+                root = (pacman, ghost, food)
+                pv_hits += bool(variation) and variation[0] == root
+                engine, value, direction, elapsed = search(
+                    game, root, guess, tt, True)
+                totals['reuse'][0] += engine.nodes
+                totals['reuse'][1] += elapsed
+                variation = engine.principal_variation(root)
+                for name, options in (('fresh', (TranspositionTable(), True)),
+                                      ('none', (None, False))):
+                    other, other_value, _, elapsed = search(
+                        game, root, guess, *options)
+                    totals[name][0] += other.nodes
+                    totals[name][1] += elapsed
+                    mismatches += other_value != value
+                moves += 1
+
+                pacman, food, reward, outcome = game.pacmanStep(
+                    pacman, ghost, food, direction)
+                value -= reward
+                if outcome != ONGOING:
+                    break
+                ghost, reward, outcome = sample_ghost(game, table, pacman,
+                                                      ghost, rng)
+                value -= reward
+                if outcome != ONGOING:
+                    break
+                guess = value
+        print(f'{layout_name} vs {ghost_name}: {moves} moves, '
+              f'PV predicted {pv_hits} roots, {mismatches} value '
+              f'mismatches', flush=True)
+        for name, (nodes, elapsed) in totals.items():
+            print(f'    {name:5s}: {nodes / moves:8.0f} nodes/move '
+                  f'{1000 * elapsed / moves:6.1f} ms/move', flush=True)
@@ -0,0 +1,87 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout, pursuit
+from pacman_module.game import Actions, Configuration
+from pacman_module.pacman import GameState, PacmanRules, GhostRules
+from pacman_module.compiledLayout import DIRECTIONS
+from helpers import trap_layout
+
+# Compare the capture times of `pursuit.solveCaptureTimes` with a
+# brute-force value iteration over the legal actions of GameStates: Pacman
+# delays the capture as long as he can, the ghost hastens it. On the
+# provided layouts Pacman always escapes a ghost that is not next to him;
+# the trap layout has a dead end, hence non-trivial capture times.
+trap = trap_layout()
+layouts = [('small_adv', layout.getLayout('small_adv')), ('trap', trap)]
+
+
+def legal_moves(state, agent_index, pos, direction):
+    """Returns the positions an agent reaches with its legal actions."""
+    state.data.agentStates[agent_index].configuration = \
+        Configuration(pos, direction)
+    if agent_index == 0:
+        actions = PacmanRules.getLegalActions(state)
+    else:
+        actions = GhostRules.getLegalActions(state, agent_index)
+    return [(Actions.getSuccessor(pos, action), action)
+            for action in actions]
+
+
+errors = 0
+for layout_name, lay in layouts:
+    state = GameState()
+    state.initialize(lay, 1)
+    cells = [tuple(int(c) for c in pos) for pos in lay.getCellPositions()]
+    ghosts = [(pos, direction) for pos in cells for direction in DIRECTIONS]
+    pacman_moves = {pos: [target for target, _ in
+                          legal_moves(state, 0, pos, DIRECTIONS[-1])]
+                    for pos in cells}
+    ghost_moves = {ghost: legal_moves(state, 1, *ghost) for ghost in ghosts}
+
+    # times[side][(pacman, ghost)], None while the capture is not forced
+    times = [{}, {}]
+    for side in range(2):
+        for pacman in cells:
+            for ghost in ghosts:
+                times[side][(pacman, ghost)] = \
+                    0 if pacman == ghost[0] else None
+    moves = 0
+    changed = True
+    while changed:
+        moves += 1
+        changed = False
+        updates = []
+        for pacman in cells:
+            for ghost in ghosts:
+                if times[pursuit.GHOST_TO_MOVE][(pacman, ghost)] is None and \
+                        any(times[pursuit.PACMAN_TO_MOVE][(pacman, child)]
+                            == moves - 1 for child in ghost_moves[ghost]):
+                    updates.append((pursuit.GHOST_TO_MOVE, pacman, ghost))
+                if times[pursuit.PACMAN_TO_MOVE][(pacman, ghost)] is None and \
+                        all(times[pursuit.GHOST_TO_MOVE][(target, ghost)]
+                            is not None for target in pacman_moves[pacman]):
+                    updates.append((pursuit.PACMAN_TO_MOVE, pacman, ghost))
+        for side, pacman, ghost in updates:
+            times[side][(pacman, ghost)] = moves
+            changed = True
+
+    checked = forced = 0
+    for side in range(2):
+        for (pacman, (ghost_pos, direction)), expected in \
+                times[side].items():
+            actual = lay.getCaptureTime(
+                pacman, ghost_pos, direction,
+                pacmanToMove=side == pursuit.PACMAN_TO_MOVE)
+            checked += 1
+            forced += expected is not None
+            if actual != expected:
+                errors += 1
+                print(f'{layout_name}: {pacman} vs {ghost_pos} {direction}: '
+                      f'expected {expected}, got {actual}')
+    print(f'{layout_name}: {checked} positions, {forced} forced captures',
+          flush=True)
+print(f'{errors} errors')
+sys.exit(1 if errors else 0)
@@ -0,0 +1,46 @@
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.foodHeuristic import FoodHeuristic
+from pacman_module.foodPlanner import FoodPlanner
+
+# Check that the MST food heuristic never overestimates the exact eating
+# cost of `FoodPlanner`, and that its nearest-food term is the smallest
+# maze distance to a dot, on random Pacman positions and food subsets.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+positions_per_layout = 2000
+
+random.seed(0)
+errors = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    heuristic = FoodHeuristic.forLayout(lay)
+    planner = FoodPlanner.forLayout(lay)
+    cells = [tuple(int(c) for c in pos) for pos in lay.getCellPositions()]
+    food_positions = lay.getFoodPositions()
+    gap = 0
+    for _ in range(positions_per_layout):
+        pos = random.choice(cells)
+        indices = random.sample(range(len(food_positions)),
+                                random.randint(0, len(food_positions)))
+        mask = sum(1 << i for i in indices)
+        estimate = heuristic.getEstimate(pos, mask)
+        cost = planner.getPlanCost(pos, mask)
+        gap += cost - estimate
+        if estimate > cost:
+            errors += 1
+            print(f'{layout_name}: estimate {estimate} above cost {cost}')
+        nearest = min((lay.getMazeDistance(pos, food_positions[i])
+                       for i in indices), default=0)
+        if heuristic.getNearestFoodDistance(pos, mask) != nearest:
+            errors += 1
+            print(f'{layout_name}: wrong nearest food distance')
+    print(f'{layout_name}: mean gap to the exact cost '
+          f'{gap / positions_per_layout:.2f} moves, '
+          f'hit rate {heuristic.getHitRate():.2f}', flush=True)
+print(f'{errors} errors')
+sys.exit(1 if errors else 0)
@@ -0,0 +1,57 @@
+import itertools
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.foodPlanner import FoodPlanner
+
+# Compare the Held-Karp plan costs of `FoodPlanner` with the best of all
+# eating orders, and check that the returned plan has that cost, for random
+# Pacman positions and food subsets.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+positions_per_layout = 200
+max_food = 6
+
+
+def walk_cost(lay, pos, plan):
+    """Returns the number of moves to visit the positions of `plan` in
+    order, starting from `pos`."""
+    cost = 0
+    for dot in plan:
+        cost += lay.getMazeDistance(pos, dot)
+        pos = dot
+    return cost
+
+
+random.seed(0)
+errors = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    planner = FoodPlanner.forLayout(lay)
+    cells = [tuple(int(c) for c in pos) for pos in lay.getCellPositions()]
+    food_positions = lay.getFoodPositions()
+    for _ in range(positions_per_layout):
+        pos = random.choice(cells)
+        indices = random.sample(range(len(food_positions)),
+                                random.randint(0, min(max_food,
+                                                      len(food_positions))))
+        mask = sum(1 << i for i in indices)
+        dots = [food_positions[i] for i in indices]
+        expected = min(walk_cost(lay, pos, order)
+                       for order in itertools.permutations(dots))
+        cost = planner.getPlanCost(pos, mask)
+        plan = planner.getPlan(pos, mask)
+        if cost != expected:
+            errors += 1
+            print(f'{layout_name}: plan cost {cost}, expected {expected}')
+        if sorted(plan) != sorted(dots) or \
+                walk_cost(lay, pos, plan) != expected:
+            errors += 1
+            print(f'{layout_name}: suboptimal plan {plan}')
+    print(f'{layout_name}: {positions_per_layout} positions checked',
+          flush=True)
+print(f'{errors} errors')
+sys.exit(1 if errors else 0)
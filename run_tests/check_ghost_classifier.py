@@ -0,0 +1,72 @@
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.pacman import GameState
+from pacman_module.ghostAgents import (
+    DumbyGhost,
+    GreedyGhost,
+    SmartyGhost,
+    EastRandyGhost,
+)
+from ghost_model import GhostClassifier
+
+# Compare the table re-implementations of the ghosts with their
+# `getDistribution`, then check that the classifier identifies each ghost
+# from the moves of random games. The Smarty table is an approximation.
+ghosts = {
+    'dumby': DumbyGhost,
+    'greedy': GreedyGhost,
+    'smarty': SmartyGhost,
+    'eastrandy': EastRandyGhost,
+}
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+games_per_ghost = 10
+game_length = 30
+
+random.seed(0)
+errors = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    for name, ghost_class in ghosts.items():
+        agreement = checked = identified = 0
+        posterior_sum = 0
+        for _ in range(games_per_ghost):
+            state = GameState()
+            state.initialize(lay, 1)
+            classifier = GhostClassifier()
+            ghost = ghost_class(1)
+            for _ in range(game_length):
+                actions = [a for a in state.getLegalActions(0)
+                           if a != 'Stop']
+                previous = state.generateSuccessor(0, random.choice(actions))
+                if previous.isWin() or previous.isLose():
+                    break
+
+                # Fresh ghost, the shipped SmartyGhost caches A* scores
+                expected = ghost_class(1).getDistribution(previous)
+                expected.normalize()
+                predicted = GhostClassifier([name]).distribution(previous, 1)
+                checked += 1
+                if all(abs(expected[a] - predicted[a]) < 1e-9
+                         for a in previous.getLegalActions(1)):
+                    agreement += 1
+
+                state = previous.generateSuccessor(1, ghost.get_action(
+                    previous))
+                classifier.observe(previous, state)
+                if state.isWin() or state.isLose():
+                    break
+            posterior = classifier.posterior()
+            posterior_sum += posterior[name]
+            identified += max(posterior, key=posterior.get) == name
+        if name != 'smarty' and agreement != checked:
+            errors += 1
+        print(f'{layout_name} {name}: table agrees on {agreement}/{checked} '
+              f'states, identified in {identified}/{games_per_ghost} games, '
+              f'mean posterior {posterior_sum / games_per_ghost:.2f}')
+
+sys.exit(1 if errors else 0)
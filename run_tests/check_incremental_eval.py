@@ -0,0 +1,47 @@
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.pacman import GameState
+import martin
+
+# Compare the incremental evaluation of martin's agent with its
+# from-scratch `utility_function` along random game paths.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+paths_per_layout = 200
+path_length = 40
+
+random.seed(0)
+mismatches = 0
+checked = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    initial = GameState()
+    initial.initialize(lay, 1)
+    agent = martin.PacmanAgent()
+    agent.initial_state = initial
+    evaluator = agent.make_evaluator()
+    for _ in range(paths_per_layout):
+        state, acc = initial, evaluator.root(initial)
+        agent_index = 0
+        for _ in range(path_length):
+            expected = agent.utility_function(state)
+            actual = evaluator.evaluate(acc, state)
+            checked += 1
+            if expected != actual:
+                mismatches += 1
+                print(f'{layout_name}: expected {expected}, got {actual}')
+            if state.isWin() or state.isLose():
+                break
+            actions = [a for a in state.getLegalActions(agent_index)
+                       if a != 'Stop']
+            state = state.generateSuccessor(agent_index,
+                                             random.choice(actions))
+            acc = evaluator.advance(acc, agent_index, state)
+            agent_index = (agent_index + 1) % state.getNumAgents()
+
+print(f'Checked {checked} states, {mismatches} mismatches')
+sys.exit(1 if mismatches else 0)
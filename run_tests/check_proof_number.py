@@ -0,0 +1,75 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame, WIN, LOSE
+from pacman_module.pacman import TIME_PENALTY, FOOD_REWARD
+from pacman_module.tablebase import Tablebase, UNBOUNDED
+from proof_number import ProofNumberSearch
+from helpers import random_position, trap_layout
+
+# Check the outcomes decided by the proof-number search against the exact
+# values of the endgame tablebases, on random positions: a proven win must
+# have a positive value (a capture costs more than all the dots bring), a
+# proven loss a negative one. Also report how many of the positions the
+# tablebase decides are decided within the node budget. Pacman escapes the
+# ghost from every position of the provided layouts; in the trap layout,
+# he is caught when the ghost follows him into the dead end.
+trap = trap_layout()
+# (name, layout, maximum food, positions)
+layouts = [(name, layout.getLayout(name), max_food, 100)
+           for name, max_food in [('small_adv', 2), ('medium_adv', 5),
+                                  ('large_adv', 4)]]
+layouts.append(('trap', trap, 3, 500))
+max_nodes = 5000
+
+
+random.seed(0)
+errors = 0
+for layout_name, lay, max_food, positions in layouts:
+    game = CompactGame.forLayout(lay)
+    tablebase = Tablebase.forLayout(lay, max_food)
+    counts = {'win': [0, 0], 'loss': [0, 0]}
+    elapsed = 0.0
+    for _ in range(positions):
+        pacman, ghost, food = random_position(game, max_food=max_food)
+        value = int(tablebase.values[tablebase.maskIndex[food], 0, pacman,
+                                     ghost])
+        prover = ProofNumberSearch(game, max_nodes)
+        start = time.perf_counter()
+        outcome, direction = prover.solve((pacman, ghost, food))
+        elapsed += time.perf_counter() - start
+        if outcome == WIN and (value == UNBOUNDED or value <= 0):
+            errors += 1
+            print(f'{layout_name}: proven win with value {value}')
+        if outcome == LOSE and (value == UNBOUNDED or value >= 0):
+            errors += 1
+            print(f'{layout_name}: proven loss with value {value}')
+        if outcome == WIN:
+            # The proven move must keep a won position
+            _, target, child_food, _ = next(
+                move for move in prover.pacman_moves(pacman, ghost, food)
+                if move[0] == direction)
+            reward = -TIME_PENALTY + FOOD_REWARD * (
+                bin(food).count('1') - bin(child_food).count('1'))
+            if child_food:
+                future = int(tablebase.values[tablebase.maskIndex[child_food],
+                                              1, target, ghost])
+                if future == UNBOUNDED or reward + future <= 0:
+                    errors += 1
+                    print(f'{layout_name}: losing proven move')
+        if value != UNBOUNDED:
+            key = 'win' if value > 0 else 'loss'
+            counts[key][0] += 1
+            counts[key][1] += outcome == (WIN if key == 'win' else LOSE)
+    print(f'{layout_name}: wins decided {counts["win"][1]}/'
+          f'{counts["win"][0]}, losses decided {counts["loss"][1]}/'
+          f'{counts["loss"][0]}, '
+          f'{1000 * elapsed / positions:.1f} ms/position',
+          flush=True)
+print(f'{errors} errors')
+sys.exit(1 if errors else 0)
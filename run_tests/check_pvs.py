@@ -0,0 +1,62 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.compactGame import CompactGame
+from alphabeta import AlphaBeta
+from helpers import random_position
+
+# Check that principal variation search, with and without aspiration
+# windows, returns exactly the root value of plain alpha-beta on random
+# positions of every shipped layout, and compare the nodes searched.
+# Aspiration windows are centred on the depth - 1 value, as in iterative
+# deepening, or on a perturbed guess to exercise the re-searches.
+layouts = ['small_adv', 'medium_adv', 'large_adv']
+positions_per_layout = 1000
+depth = 3
+
+
+random.seed(0)
+mismatches = 0
+for layout_name in layouts:
+    lay = layout.getLayout(layout_name)
+    game = CompactGame.forLayout(lay)
+    engines = {
+        'alpha-beta': AlphaBeta(game, depth),
+        'pvs': AlphaBeta(game, depth, pvs=True),
+        'pvs+aspiration': AlphaBeta(game, depth, pvs=True, aspiration=20),
+        'pvs+aspiration(off)': AlphaBeta(game, depth, pvs=True,
+                                         aspiration=5),
+    }
+    shallow = AlphaBeta(game, depth - 1)
+    nodes = dict((name, 0) for name in engines)
+    times = dict((name, 0) for name in engines)
+    for _ in range(positions_per_layout):
+        root = random_position(game)
+        guess, _ = shallow.search(root)
+        values = {}
+        for name, engine in engines.items():
+            start = time.perf_counter()
+            if name == 'pvs+aspiration(off)':
+                values[name], _ = engine.search(
+                    root, guess + random.randint(-300, 300))
+            else:
+                values[name], _ = engine.search(root, guess)
+            times[name] += time.perf_counter() - start
+            nodes[name] += engine.nodes
+        for name, value in values.items():
+            if value != values['alpha-beta']:
+                mismatches += 1
+                print(f'{layout_name} {root} {name}: {value} != '
+                      f'{values["alpha-beta"]}')
+    print(f'{layout_name}, {positions_per_layout} positions at depth '
+          f'{depth}: ' + ', '.join(
+              f'{name} {nodes[name]} nodes {times[name]:.2f}s'
+              for name in engines), flush=True)
+
+print(f'{mismatches} mismatches')
+sys.exit(1 if mismatches else 0)
@@ -0,0 +1,93 @@
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.game import Configuration
+from pacman_module.pacman import GameState
+from pacman_module.compiledLayout import DIRECTIONS
+from pacman_module.tablebase import Tablebase, UNBOUNDED
+from helpers import trap_layout
+
+# Check that the endgame tablebases satisfy the Bellman equations over
+# GameState successors on random states: the value of a state is the best
+# immediate score change plus the value of the successor, for Pacman, and
+# the worst for the ghost. UNBOUNDED is below every value. The trap layout
+# has a dead end, where the ghost can catch Pacman.
+trap = trap_layout()
+# (name, layout, maximum food)
+layouts = [(name, layout.getLayout(name), max_food)
+           for name, max_food in [('small_adv', 2), ('medium_adv', 5),
+                                  ('large_adv', 4)]]
+layouts.append(('trap', trap, 3))
+states_per_layout = 1000
+
+
+def random_state(lay, initial, max_food):
+    """Returns a random non-terminal GameState with one ghost and at most
+    `max_food` dots."""
+    cells = [tuple(int(c) for c in pos) for pos in lay.getCellPositions()]
+    food_positions = lay.getFoodPositions()
+    while True:
+        pacman, ghost = random.sample(cells, 2)
+        food = random.sample(food_positions,
+                             random.randint(1, min(max_food,
+                                                   len(food_positions))))
+        if pacman in food:
+            continue
+        state = initial.deepCopy()
+        data = state.data
+        data.agentStates[0].configuration = \
+            Configuration(pacman, DIRECTIONS[-1])
+        data.agentStates[1].configuration = \
+            Configuration(ghost, random.choice(DIRECTIONS))
+        for x, y in food_positions:
+            data.food[x][y] = (x, y) in food
+        data.foodPositions = tuple(data.food.asList())
+        data.numFood = len(data.foodPositions)
+        return state
+
+
+def backup(tablebase, state, agent_index):
+    """Returns the value of `state` from the tablebase values of its
+    successors, None standing for UNBOUNDED."""
+    values = []
+    for action in state.getLegalActions(agent_index):
+        successor = state.generateSuccessor(agent_index, action)
+        value = successor.getScore() - state.getScore()
+        if not (successor.isWin() or successor.isLose()):
+            future = tablebase.getValue(successor,
+                                        pacmanToMove=agent_index == 1)
+            value = None if future == UNBOUNDED else value + future
+        values.append(value)
+    bounded = [value for value in values if value is not None]
+    if agent_index == 0:
+        return max(bounded) if bounded else None
+    return min(values) if len(bounded) == len(values) else None
+
+
+random.seed(0)
+errors = 0
+for layout_name, lay, max_food in layouts:
+    initial = GameState()
+    initial.initialize(lay, 1)
+    tablebase = Tablebase.forLayout(lay, max_food)
+    unbounded = negative = 0
+    for _ in range(states_per_layout):
+        state = random_state(lay, initial, max_food)
+        for agent_index in (0, 1):
+            value = tablebase.getValue(state, pacmanToMove=agent_index == 0)
+            value = None if value == UNBOUNDED else value
+            unbounded += value is None
+            negative += value is not None and value < 0
+            expected = backup(tablebase, state, agent_index)
+            if value != expected:
+                errors += 1
+                print(f'{layout_name}: agent {agent_index}: value {value}, '
+                      f'backed up {expected}')
+    print(f'{layout_name}: {2 * states_per_layout} values, '
+          f'{negative} negative, {unbounded} unbounded', flush=True)
+print(f'{errors} errors')
+sys.exit(1 if errors else 0)
@@ -0,0 +1,124 @@
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pacman_module import layout
+from pacman_module.pacman import GameState
+from pacman_module.compactGame import NUM_HEADINGS
+
+# Positions, games and layouts shared by the checks and benchmarks.
+
+
+def trap_layout():
+    """Returns a small layout with a dead end, where the ghost can catch
+    Pacman. In the provided layouts, Pacman escapes the ghost from every
+    position where it is not next to him."""
+    return layout.Layout(['%%%%%%%%%%',
+                          '%.  P   .%',
+                          '%.%%%%%%.%',
+                          '%.  G   .%',
+                          '%%%%.%%%%%',
+                          '%%%%.%%%%%',
+                          '%%%%.%%%%%',
+                          '%%%%%%%%%%'])
+
+
+def random_position(game, rng=random, max_food=None, min_distance=1,
+                    max_distance=None):
+    """Returns a random compact state with Pacman to move.
+
+    Arguments:
+        game: a `compactGame.CompactGame`.
+        rng: the random number generator.
+        max_food: the maximum number of dots, or None for any subset of
+            the layout's dots.
+        min_distance, max_distance: the range of the maze distance between
+            Pacman and the ghost, unbounded above if max_distance is None.
+
+    Return:
+        A compact state (pacman, ghost, food) in which the ghost can move
+        and at least one dot is left.
+    """
+    while True:
+        pacman = rng.randrange(game.numCells)
+        ghost = rng.randrange(game.numCells) * NUM_HEADINGS + \
+            rng.randrange(NUM_HEADINGS)
+        distance = game.distances[pacman, ghost // NUM_HEADINGS]
+        if distance < min_distance or \
+                (max_distance is not None and distance > max_distance) or \
+                not game.ghostSuccessors[ghost]:
+            continue
+        if max_food is None:
+            food = rng.randrange(1, 1 << game.numFood)
+        else:
+            bits = rng.sample(range(game.numFood),
+                              rng.randint(1, min(max_food, game.numFood)))
+            food = sum(1 << i for i in bits)
+        food &= ~game.foodBits[pacman]
+        if food:
+            return pacman, ghost, food
+
+
+def random_states(lay, count):
+    """Returns `count` ongoing GameStates with one ghost, reached by up to
+    20 random move pairs from the initial state of `lay`."""
+    initial = GameState()
+    initial.initialize(lay, 1)
+    states = []
+    while len(states) < count:
+        state = initial
+        for _ in range(random.randint(0, 20)):
+            for agent_index in (0, 1):
+                actions = [a for a in state.getLegalActions(agent_index)
+                           if a != 'Stop']
+                state = state.generateSuccessor(agent_index,
+                                                random.choice(actions))
+                if state.isWin() or state.isLose():
+                    break
+            if state.isWin() or state.isLose():
+                break
+        if not (state.isWin() or state.isLose()):
+            states.append(state)
+    return states
+
+
+def play(lay, agent, ghost, max_moves, frame_time=0):
+    """Plays a game of `agent` against `ghost` on `lay`, without display,
+    and lets the agent release its resources at the end (`final`).
+
+    Arguments:
+        lay: a `layout.Layout`.
+        agent: a Pacman agent.
+        ghost: a ghost agent of index 1.
+        max_moves: the maximum number of Pacman moves.
+        frame_time: the time to wait after each ghost move, as a display
+            would, in seconds.
+
+    Return:
+        A tuple (final state, number of Pacman moves, time spent in the
+        agent's `get_action`, time spent in the ghost's).
+    """
+    state = GameState()
+    state.initialize(lay, 1)
+    moves = 0
+    search_time = ghost_time = 0.0
+    while not (state.isWin() or state.isLose()) and moves < max_moves:
+        start = time.perf_counter()
+        action = agent.get_action(state)
+        search_time += time.perf_counter() - start
+        state = state.generateSuccessor(0, action)
+        moves += 1
+        if state.isWin() or state.isLose():
+            break
+        start = time.perf_counter()
+        action = ghost.get_action(state)
+        ghost_time += time.perf_counter() - start
+        state = state.generateSuccessor(1, action)
+        if frame_time:
+            time.sleep(frame_time)
+    if 'final' in dir(agent):
+        agent.final(state)
+    return state, moves, search_time, ghost_time